@@ -1,77 +1,53 @@
-
-import pandas as pd
 import numpy as np
 import streamlit as st
-from prophet_method import Prophet
-from sklearn.preprocessing import MinMaxScaler
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dropout, Dense
-import matplotlib.pyplot as plt
-from tensorflow.keras.callbacks import Callback
+import charts
+from jobs import get_job_manager, show_job
+from lstm_forecast import TARGETS, prepare_series, serve_forecast
+
+
+def show_lstm_forecast(future_preds, selected_column, periods):
+    st.write(np.asarray(future_preds).reshape(-1, 1))
+    # Plot Future Predictions
+    fig, ax = charts.figure("lstm-forecast", figsize=(8, 5))
+    ax.plot(future_preds, marker="o", color="green", label=f"Future {selected_column} Predictions")
+    ax.set_title(f"{periods}-Step Ahead Predictions for {selected_column}")
+    ax.set_xlabel("Future Time Steps")
+    ax.set_ylabel(f"{selected_column} Price")
+    ax.legend()
+    ax.grid(True)
+    charts.show(fig, chart="lstm-forecast")
 
 
+def show_multivariate_forecast(bars, selected_column, periods):
+    st.dataframe(bars)
+    show_lstm_forecast(bars[selected_column].to_numpy(), selected_column, periods)
 
-def LSTM_func(data,selected_column,periods):
+
+def LSTM_func(data,selected_column,periods,mode="recursive",ticker=None,interval=None,multivariate=False):
+    # mode "recursive" feeds each prediction back in (one compiled rollout),
+    # mode "direct" trains a head that predicts all `periods` steps at once
     st.empty()
     st.subheader("LSTM Forecast")
-    data["MA20"] = data[selected_column].rolling(window=20).mean()
-    data.dropna(inplace=True)
-    scaler = MinMaxScaler()
-    data["Scaled"] = scaler.fit_transform(data[selected_column].values.reshape(-1, 1))
-    def window(data, window_size):
-        X, y = [], []
-        for i in range(len(data) - window_size):
-            X.append(data[i:i + window_size])
-            y.append(data[i + window_size])
-        return np.array(X), np.array(y)
-    window_size = 30
-    X, y = window(data["Scaled"].values, window_size)
-    split = int(len(X) * 0.8)
-    X_train, X_test = X[:split], X[split:]
-    y_train, y_test = y[:split], y[split:]
-    X_train = X_train.reshape(X_train.shape[0], X_train.shape[1], 1)
-    X_test = X_test.reshape(X_test.shape[0], X_test.shape[1], 1)
-    # Initialize Streamlit progress bar
-    progress_bar = st.progress(0)  # Create progress bar initially at 0%
-    # Define a callback to update the progress bar during training
-    class ProgressBarCallback(Callback):
-        def on_epoch_end(self, epoch, logs=None):
-            progress = (epoch + 1) / self.params['epochs']
-            progress_bar.progress(progress)  # Update the progress bar
-    model = Sequential()
-    model.add(LSTM(units=120, return_sequences=True, input_shape=(X_train.shape[1], 1)))
-    model.add(Dropout(0.2))
-    model.add(LSTM(units=120,return_sequences=True))
-    model.add(Dropout(0.2))
-    model.add(LSTM(units=120))
-    model.add(Dropout(0.2))
-    model.add(Dense(units=1))
-    model.compile(optimizer="adam", loss="mean_squared_error")
-    # Add the custom callback to the fit method
-    model.fit(X_train, y_train, epochs=10, batch_size=32, validation_data=(X_test, y_test),
-              callbacks=[ProgressBarCallback()])
-    # Future Predictions
-    future_pred = X_test[-1].copy()  # Start from the last element of X_test
-    future_preds = []
-    # Loop for predicting future steps
-    for _ in range(periods):
-        # Predict the next step
-        next_pred = model.predict(future_pred.reshape(1, window_size, 1))  # Ensure the shape is (1, window_size, 1)
-
-        # Append the predicted value (next_pred is 2D, so extract the scalar value)
-        future_preds.append(next_pred[-1, 0])  # Get the last predicted value
-        # Update future_pred: shift and append the new prediction
-        future_pred = np.roll(future_pred, -1)  # Shift all values left by 1
-        future_pred[-1] = next_pred[-1, 0]  # Append the predicted value (scalar)
-    # Inverse transform future predictions
-    future_preds = scaler.inverse_transform(np.array(future_preds).reshape(-1, 1))
-    st.write(future_preds)
-    # Plot Future Predictions
-    plt.figure(figsize=(8, 5))
-    plt.plot(future_preds, marker="o", color="green", label=f"Future {selected_column} Predictions")
-    plt.title(f"{periods}-Step Ahead Predictions for {selected_column}")
-    plt.xlabel("Future Time Steps")
-    plt.ylabel(f"{selected_column} Price")
-    plt.legend()
-    plt.grid(True)
-    st.pyplot(plt)
\ No newline at end of file
+    # The single-column path keeps its own model rather than viewing one column of
+    # the joint model: its stored models are served by the NumPy engine and use the
+    # settings lstm_tuning found for that column
+    if multivariate and selected_column not in TARGETS:
+        st.warning(f"{selected_column} is not among the jointly forecast columns; forecasting it on its own.")
+    elif multivariate:
+        # One model for every OHLCV column: the job is shared whichever column is shown
+        job_id = get_job_manager().submit("lstm_multi", data, periods=periods, mode=mode, ticker=ticker,
+                                          interval=interval)
+        show_job(job_id, lambda bars: show_multivariate_forecast(bars, selected_column, periods))
+        return
+    series = prepare_series(data, selected_column)
+    # A model already trained on this data is served with NumPy, without TensorFlow
+    future_preds = serve_forecast(series, periods, mode=mode, ticker=ticker, interval=interval,
+                                  column=selected_column)
+    if future_preds is not None:
+        st.info("Using a previously trained model for this data.")
+        show_lstm_forecast(future_preds, selected_column, periods)
+        return
+    # Training runs in a worker process; this page only polls its progress
+    job_id = get_job_manager().submit("lstm", series, periods=periods, mode=mode, ticker=ticker,
+                                      interval=interval, column=selected_column)
+    show_job(job_id, lambda future_preds: show_lstm_forecast(future_preds, selected_column, periods))
@@ -0,0 +1,149 @@
+# Precomputed analytics handed to the LLM agents as context
+#
+# The dataframe agents used to work out trend, returns or volatility by writing
+# pandas code over several ReAct round trips. summarize() computes those figures
+# once, vectorized over the full history: returns, rolling volatility, the
+# RSI/MACD state, support/resistance levels and drawdowns. context() renders
+# them as compact JSON for the prompt, so most questions need a single LLM
+# call; the agent's Python tool remains for anything the summary doesn't cover.
+import json
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from indicators import compute_indicators
+
+# Approximate bars per year, to annualize volatility (6.5-hour sessions for intraday bars)
+BARS_PER_YEAR = {
+    "1m": 252 * 390,
+    "5m": 252 * 78,
+    "30m": 252 * 13,
+    "60m": 252 * 7,
+    "1d": 252,
+    "5d": 52,
+    "1wk": 52,
+    "1mo": 12,
+    "3mo": 4,
+}
+
+RETURN_HORIZONS = [1, 5, 20, 60, 250]
+
+
+def _round(value, digits=4):
+    return None if value is None or not np.isfinite(value) else round(float(value), digits)
+
+
+def _timestamp(data, position):
+    if "Date" in data.columns or "Datetime" in data.columns:
+        value = data["Date" if "Date" in data.columns else "Datetime"].iloc[position]
+    else:
+        value = data.index[position]
+    return str(value)
+
+
+def pivot_levels(high, low, close, order=5, count=3):
+    """Support and resistance: the nearest swing lows below and swing highs above the last close.
+
+    A swing high is the highest high of the `order` bars on each side of it,
+    likewise for swing lows. Returns (supports descending, resistances ascending).
+    """
+    width = 2 * order + 1
+    if len(close) < width:
+        return [], []
+    centre = slice(order, len(close) - order)
+    swing_highs = high[centre][high[centre] >= sliding_window_view(high, width).max(axis=1)]
+    swing_lows = low[centre][low[centre] <= sliding_window_view(low, width).min(axis=1)]
+    last = close[-1]
+    supports = np.unique(swing_lows[swing_lows < last])[::-1][:count]
+    resistances = np.unique(swing_highs[swing_highs > last])[:count]
+    return supports.tolist(), resistances.tolist()
+
+
+def summarize(data, interval=None, column="Close"):
+    """Analytics of a bar frame with OHLC columns, as a JSON-ready dict."""
+    close = data[column].to_numpy(dtype=np.float64)
+    valid = ~np.isnan(close)
+    frame = data[valid]
+    close = close[valid]
+    if len(close) < 2:
+        raise ValueError(f"Not enough bars to summarize: {len(close)}")
+    last = close[-1]
+    log_returns = np.diff(np.log(close))
+
+    returns = {
+        f"{n}_bars_pct": _round((last / close[-n - 1] - 1) * 100, 2)
+        for n in RETURN_HORIZONS if len(close) > n
+    }
+
+    volatility = {}
+    per_year = BARS_PER_YEAR.get(interval)
+    for window in (20, 60):
+        if len(log_returns) >= window:
+            sigma = log_returns[-window:].std(ddof=1)
+            volatility[f"{window}_bar_pct"] = _round(sigma * 100, 3)
+            if per_year:
+                volatility[f"{window}_bar_annualized_pct"] = _round(sigma * np.sqrt(per_year) * 100, 2)
+
+    computed = compute_indicators(frame)
+    indicators, previous = computed.iloc[-1], computed.iloc[-2]
+    rsi = indicators["RSI"]
+    momentum = {
+        "rsi": _round(rsi, 1),
+        "rsi_zone": None if np.isnan(rsi) else "overbought" if rsi > 70 else "oversold" if rsi < 30 else "neutral",
+        "macd": _round(indicators["MACD"]),
+        "macd_signal": _round(indicators["MACD Signal"]),
+        "macd_above_signal": bool(indicators["MACD"] > indicators["MACD Signal"]),
+        "macd_crossed_this_bar": bool(
+            (indicators["MACD"] > indicators["MACD Signal"]) != (previous["MACD"] > previous["MACD Signal"])
+        ),
+        "close_vs_ma20_pct": _round((last / indicators["MA20"] - 1) * 100, 2),
+        "bollinger_upper": _round(indicators["BB Upper"]),
+        "bollinger_lower": _round(indicators["BB Lower"]),
+    }
+    if "ATR" in indicators:
+        momentum["atr"] = _round(indicators["ATR"])
+
+    running_max = np.maximum.accumulate(close)
+    drawdown = close / running_max - 1
+    trough = int(np.argmin(drawdown))
+    peak = int(np.argmax(close[:trough + 1]))
+    drawdowns = {
+        "current_pct": _round(drawdown[-1] * 100, 2),
+        "max_pct": _round(drawdown[trough] * 100, 2),
+        "max_peak": _timestamp(frame, peak),
+        "max_trough": _timestamp(frame, trough),
+    }
+
+    summary = {
+        "bars": len(close),
+        "first": _timestamp(frame, 0),
+        "last": _timestamp(frame, -1),
+        "last_close": _round(last),
+        "range_high": _round(close.max()),
+        "range_low": _round(close.min()),
+        "trend": "upward" if (returns.get("20_bars_pct") or 0) > 0 and last > indicators["MA20"]
+        else "downward" if (returns.get("20_bars_pct") or 0) < 0 and last < indicators["MA20"] else "sideways",
+        "returns": returns,
+        "volatility": volatility,
+        "momentum": momentum,
+        "drawdowns": drawdowns,
+    }
+    if {"High", "Low"} <= set(frame.columns):
+        supports, resistances = pivot_levels(
+            frame["High"].to_numpy(dtype=np.float64), frame["Low"].to_numpy(dtype=np.float64), close
+        )
+        summary["levels"] = {"support": [_round(v) for v in supports],
+                             "resistance": [_round(v) for v in resistances]}
+    if "Volume" in frame.columns and len(frame) >= 20:
+        volume = frame["Volume"].to_numpy(dtype=np.float64)
+        summary["volume_vs_20_bar_avg"] = _round(volume[-1] / volume[-20:].mean(), 2)
+    return summary
+
+
+def context(summary):
+    """The summary as compact JSON with a short instruction, for the agent's prompt."""
+    return (
+        "Precomputed analytics of the full price history (percentages in %): "
+        + json.dumps(summary, separators=(",", ":"))
+        + "\nAnswer from these figures when they cover the question; only run Python for anything else."
+    )
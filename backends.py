@@ -0,0 +1,37 @@
+# Lazy loading of the heavy ML/LLM frameworks
+import importlib
+import sys
+import threading
+
+# Short names used across the app for the modules that are slow to import
+BACKENDS = {
+    "tensorflow": "tensorflow",
+    "sklearn": "sklearn.preprocessing",
+    "prophet": "prophet",
+    "langchain_groq": "langchain_groq",
+    "langchain_agents": "langchain_experimental.agents",
+    "langchain_messages": "langchain_core.messages",
+    "langchain_callbacks": "langchain_core.callbacks",
+}
+
+_warming = {}
+_warming_lock = threading.Lock()
+
+
+def load(name):
+    """Import a backend by short name (or full module path) on first use."""
+    return importlib.import_module(BACKENDS.get(name, name))
+
+
+def loaded(name):
+    return BACKENDS.get(name, name) in sys.modules
+
+
+def warm_up(*names):
+    """Import backends on daemon threads so they are ready by the time a page needs them."""
+    with _warming_lock:
+        for name in names:
+            if name in _warming or loaded(name):
+                continue
+            thread = _warming[name] = threading.Thread(target=load, args=(name,), daemon=True)
+            thread.start()
@@ -0,0 +1,169 @@
+# Walk-forward backtests of the Prophet and LSTM forecasters
+#
+#   python -m backtest AAPL [--interval 1d] [--horizon 10] [--folds 8] [--step 10]
+#                           [--methods prophet lstm] [--workers 4] [--output folds.parquet]
+#
+# Each fold trains on every bar before its origin and forecasts the next
+# `horizon` bars; origins step back from the end of the history by `step` bars.
+# Folds of all methods run in parallel worker processes. Preparation that does
+# not depend on the origin is done once: the ds/y history, and the running
+# min/max of the series, from which each fold's MinMaxScaler is set without
+# rescanning its training data (a scaler fitted on [min, max] is identical).
+import argparse
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+METHODS = ["prophet", "lstm"]
+
+
+def origins(n_rows, horizon, n_folds, step=None, min_train=100):
+    """Fold origins (indices of the first forecast bar), oldest first."""
+    step = step or horizon
+    last = n_rows - horizon
+    result = [last - k * step for k in reversed(range(n_folds))]
+    result = [origin for origin in result if origin >= min_train]
+    if not result:
+        raise ValueError(f"Not enough bars for a {horizon}-bar backtest: {n_rows} bars, {min_train} needed to train")
+    return result
+
+
+def _prophet_fold(history, origin, horizon, params):
+    from backends import load
+
+    model = load("prophet").Prophet(**params)
+    model.uncertainty_samples = 0
+    model.fit(history.iloc[:origin])
+    # Predict at the bars' real timestamps so weekends and closed hours are skipped
+    return model.predict(history.iloc[origin:origin + horizon][["ds"]])["yhat"].to_numpy()
+
+
+def _lstm_fold(values, origin, horizon, params, value_range):
+    from backends import load
+    from lstm_forecast import direct_forecast, recursive_forecast, train_model
+
+    mode = params.get("mode", "recursive")
+    params = dict(params, horizon=horizon if mode == "direct" else 1)
+    scaler = load("sklearn").MinMaxScaler().fit(np.asarray(value_range).reshape(-1, 1))
+    scaled = scaler.transform(values[:origin].reshape(-1, 1)).ravel()
+    model = train_model(scaled, params)
+    window = scaled[-params["window_size"]:]
+    rollout = direct_forecast if mode == "direct" else recursive_forecast
+    preds = rollout(model, window, horizon)
+    return scaler.inverse_transform(np.asarray(preds).reshape(-1, 1)).ravel()
+
+
+def _run_fold(method, history, origin, horizon, params, value_range):
+    # Runs inside a worker process
+    if method == "prophet":
+        return _prophet_fold(history, origin, horizon, params)
+    if method == "lstm":
+        return _lstm_fold(history["y"].to_numpy(dtype=np.float64), origin, horizon, params, value_range)
+    raise ValueError(f"Unknown method: {method}")
+
+
+def metrics(actual, predicted, last):
+    """Error metrics of (folds, horizon) arrays; `last` is each fold's last training value.
+
+    Directional accuracy is the share of forecasts on the right side of `last`.
+    """
+    error = predicted - actual
+    moves = np.sign(predicted - last[:, None]) == np.sign(actual - last[:, None])
+    return {
+        "mae": np.abs(error).mean(),
+        "mape": np.abs(error / actual).mean() * 100,
+        "directional_accuracy": moves.mean(),
+        "mae_by_step": np.abs(error).mean(axis=0),
+    }
+
+
+def backtest(data, column="Close", methods=METHODS, horizon=10, n_folds=8, step=None, workers=None,
+             prophet_params=None, lstm_params=None):
+    """Walk-forward backtest of `methods` on a bar frame with a Date/Datetime column.
+
+    Returns (folds, summary): per-fold forecasts in long form, and one row of
+    metrics per method, best MAE first.
+    """
+    from lstm_forecast import DEFAULT_PARAMS as LSTM_PARAMS
+    from prophet_forecast import DEFAULT_PARAMS as PROPHET_PARAMS
+    from prophet_forecast import prepare_history
+
+    history = prepare_history(data, column).dropna().reset_index(drop=True)
+    params = {
+        "prophet": dict(PROPHET_PARAMS, **(prophet_params or {})),
+        "lstm": dict(LSTM_PARAMS, **(lstm_params or {})),
+    }
+    min_train = max(100, 5 * params["lstm"]["window_size"]) if "lstm" in methods else 100
+    fold_origins = origins(len(history), horizon, n_folds, step, min_train)
+    values = history["y"].to_numpy(dtype=np.float64)
+    # Training range of every possible origin, so no fold rescans its data for the scaler
+    running_min, running_max = np.minimum.accumulate(values), np.maximum.accumulate(values)
+
+    workers = workers or max(1, (os.cpu_count() or 2) // 2)
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context) as executor:
+        futures = {
+            (method, origin): executor.submit(
+                _run_fold, method, history, origin, horizon, params[method],
+                (running_min[origin - 1], running_max[origin - 1]),
+            )
+            for method in methods for origin in fold_origins
+        }
+        predictions = {key: future.result() for key, future in futures.items()}
+
+    positions = np.asarray(fold_origins)[:, None] + np.arange(horizon)
+    actual = values[positions]
+    last = values[np.asarray(fold_origins) - 1]
+    rows, folds = [], []
+    for method in methods:
+        predicted = np.stack([predictions[method, origin] for origin in fold_origins])
+        scores = metrics(actual, predicted, last)
+        by_step = scores.pop("mae_by_step")
+        rows.append(dict(method=method, folds=len(fold_origins), horizon=horizon, **scores,
+                         mae_last_step=by_step[-1]))
+        folds.append(pd.DataFrame({
+            "method": method,
+            "origin": history["ds"].to_numpy()[np.repeat(fold_origins, horizon)],
+            "step": np.tile(np.arange(1, horizon + 1), len(fold_origins)),
+            "ds": history["ds"].to_numpy()[positions.ravel()],
+            "actual": actual.ravel(),
+            "predicted": predicted.ravel(),
+        }))
+    summary = pd.DataFrame(rows).sort_values("mae", ignore_index=True)
+    return pd.concat(folds, ignore_index=True), summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the Prophet and LSTM forecasters")
+    parser.add_argument("ticker")
+    parser.add_argument("--interval", default="1d")
+    parser.add_argument("--column", default="Close")
+    parser.add_argument("--methods", nargs="+", default=METHODS, choices=METHODS)
+    parser.add_argument("--horizon", type=int, default=10)
+    parser.add_argument("--folds", type=int, default=8)
+    parser.add_argument("--step", type=int, help="bars between fold origins (default: the horizon)")
+    parser.add_argument("--epochs", type=int, help="LSTM training epochs")
+    parser.add_argument("--mode", default="recursive", choices=["recursive", "direct"], help="LSTM rollout")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--output", help="write the per-fold forecasts to this Parquet file")
+    args = parser.parse_args()
+
+    from bar_store import get_bars
+
+    data = get_bars(args.ticker, args.interval).reset_index()
+    lstm_params = {"mode": args.mode}
+    if args.epochs:
+        lstm_params["epochs"] = args.epochs
+    folds, summary = backtest(data, args.column, args.methods, args.horizon, args.folds, args.step, args.workers,
+                              lstm_params=lstm_params)
+    print(summary.to_string(index=False))
+    print(f"Best method for {args.ticker} ({args.interval}): {summary['method'].iloc[0]}")
+    if args.output:
+        folds.to_parquet(args.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
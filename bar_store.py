@@ -0,0 +1,127 @@
+# Local OHLCV bar store
+import os
+import tempfile
+from urllib.parse import quote
+
+import pandas as pd
+
+from backends import load
+from tracing import span
+
+BAR_STORE_DIR = os.environ.get("BAR_STORE_DIR", os.path.join("data", "bars"))
+
+# How far back Yahoo serves intraday bars, and how much of it one request may span
+LOOKBACK = {
+    "1m": pd.Timedelta(days=30),
+    "2m": pd.Timedelta(days=60),
+    "5m": pd.Timedelta(days=60),
+    "15m": pd.Timedelta(days=60),
+    "30m": pd.Timedelta(days=60),
+    "60m": pd.Timedelta(days=730),
+    "90m": pd.Timedelta(days=60),
+    "1h": pd.Timedelta(days=730),
+}
+REQUEST_SPAN = {"1m": pd.Timedelta(days=7)}
+
+
+def yfinance_fetcher(ticker, interval, start=None):
+    """Download bars from yfinance, optionally only from `start` onwards."""
+    yf = load("yfinance")
+    with span("yf.download", ticker=ticker, interval=interval, start=start) as stage:
+        if start is None:
+            data = yf.download(ticker, interval=interval, progress=False)
+        else:
+            data = yf.download(ticker, interval=interval, start=start, progress=False)
+        stage.set(rows=len(data))
+    return flatten_columns(data)
+
+
+def flatten_columns(data):
+    """Single ticker downloads come back with (Price, Ticker) columns; keep the price level only."""
+    if isinstance(data.columns, pd.MultiIndex):
+        data.columns = data.columns.get_level_values(0)
+    data.columns.name = None
+    return data
+
+
+class BarStore:
+    """Parquet files of bars keyed by ticker and interval.
+
+    `fetcher(ticker, interval, start=None)` must return a frame indexed by bar
+    timestamp. Only bars from the last stored timestamp onwards are requested;
+    the last stored bar is fetched again because it may still have been forming.
+    When that timestamp is beyond what the provider serves for the interval, or
+    the incremental fetch comes back empty, a full fetch is merged instead.
+    """
+
+    def __init__(self, root=BAR_STORE_DIR, fetcher=yfinance_fetcher):
+        self.root = root
+        self.fetcher = fetcher
+
+    def path(self, ticker, interval):
+        return os.path.join(self.root, interval, quote(ticker, safe="") + ".parquet")
+
+    def load(self, ticker, interval):
+        path = self.path(ticker, interval)
+        if not os.path.exists(path):
+            return pd.DataFrame()
+        return pd.read_parquet(path)
+
+    def save(self, ticker, interval, data):
+        path = self.path(ticker, interval)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write next to the target and swap in so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        os.close(fd)
+        try:
+            data.to_parquet(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def update(self, ticker, interval):
+        """Append bars newer than the last stored one and return the full history."""
+        stored = self.load(ticker, interval)
+        start = stored.index[-1] if not stored.empty else None
+        if start is not None and not self._reachable(start, interval):
+            start = None
+        new = self.fetcher(ticker, interval, start=start)
+        if (new is None or new.empty) and start is not None:
+            new = self.fetcher(ticker, interval, start=None)
+        if new is None or new.empty:
+            return stored
+        if stored.empty:
+            combined = new
+        else:
+            combined = pd.concat([stored, new[stored.columns.intersection(new.columns)]])
+            combined = combined[~combined.index.duplicated(keep="last")]
+        combined = combined.sort_index()
+        self.save(ticker, interval, combined)
+        return combined
+
+    @staticmethod
+    def _reachable(start, interval):
+        # A request starting at `start` must be inside both the lookback and the per-request span
+        limits = [limit for limit in (LOOKBACK.get(interval), REQUEST_SPAN.get(interval)) if limit is not None]
+        if not limits:
+            return True
+        return pd.Timestamp.now(tz=start.tz) - start < min(limits)
+
+    def get(self, ticker, interval, period=None):
+        """Return bars for ticker/interval, optionally only the trailing `period` (e.g. "5d")."""
+        data = self.update(ticker, interval)
+        if period is not None and not data.empty:
+            data = data[data.index >= data.index[-1] - pd.Timedelta(period)]
+        return data
+
+
+_default_store = None
+
+
+def get_bars(ticker, interval, period=None):
+    """Read bars through the shared on-disk store."""
+    global _default_store
+    if _default_store is None:
+        _default_store = BarStore()
+    return _default_store.get(ticker, interval, period=period)
@@ -0,0 +1,134 @@
+# Fixed-size live bar buffers for the real-time charts
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from bar_store import yfinance_fetcher
+from market_data import get_bars
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+class BarRingBuffer:
+    """The most recent `capacity` bars in preallocated arrays.
+
+    Appending costs O(new bars) no matter how long the stream has been running.
+    A bar with the same timestamp as the newest one replaces it, since the
+    latest bar keeps changing until its interval closes.
+    """
+
+    def __init__(self, capacity, columns=COLUMNS):
+        self.capacity = capacity
+        self.columns = list(columns)
+        self.times = np.zeros(capacity, dtype=np.int64)
+        self.values = np.full((capacity, len(self.columns)), np.nan)
+        self.start = 0
+        self.size = 0
+        self.tz = None
+        self.index_name = None
+
+    def __len__(self):
+        return self.size
+
+    def _positions(self, offset, count):
+        return (self.start + offset + np.arange(count)) % self.capacity
+
+    def last_time(self):
+        if not self.size:
+            return None
+        last = self.times[(self.start + self.size - 1) % self.capacity]
+        return pd.Timestamp(last, tz="UTC").tz_convert(self.tz) if self.tz else pd.Timestamp(last)
+
+    def extend(self, data):
+        """Append the bars of `data` newer than the buffer's last bar; returns how many were added."""
+        if data is None or data.empty:
+            return 0
+        index = pd.DatetimeIndex(data.index)
+        if self.size == 0:
+            self.tz, self.index_name = index.tz, data.index.name
+        times = index.as_unit("ns").asi8
+        values = data.reindex(columns=self.columns).to_numpy(dtype=np.float64)
+        if self.size:
+            last_pos = (self.start + self.size - 1) % self.capacity
+            last = self.times[last_pos]
+            same = times == last
+            if same.any():
+                self.values[last_pos] = values[same][-1]
+            newer = times > last
+            times, values = times[newer], values[newer]
+        times, values = times[-self.capacity:], values[-self.capacity:]
+        added = len(times)
+        if not added:
+            return 0
+        positions = self._positions(self.size, added)
+        self.times[positions] = times
+        self.values[positions] = values
+        total = self.size + added
+        if total > self.capacity:
+            self.start = (self.start + total - self.capacity) % self.capacity
+        self.size = min(total, self.capacity)
+        return added
+
+    def frame(self, since=None, inclusive=False):
+        """Buffered bars in time order, optionally only those after `since` (or from it, with `inclusive`)."""
+        positions = self._positions(0, self.size)
+        times = self.times[positions]
+        if since is not None:
+            first = np.searchsorted(times, pd.Timestamp(since).value, side="left" if inclusive else "right")
+            positions, times = positions[first:], times[first:]
+        index = pd.DatetimeIndex(times.astype("datetime64[ns]"), name=self.index_name)
+        if self.tz is not None:
+            index = index.tz_localize("UTC").tz_convert(self.tz)
+        return pd.DataFrame(self.values[positions], index=index, columns=self.columns)
+
+
+class BarStream:
+    """A ring buffer for one (ticker, interval) kept current by delta fetches.
+
+    Streams are shared by every session, so a ticker is fetched at most once
+    per `min_poll` seconds however many charts show it.
+    """
+
+    def __init__(self, ticker, interval, capacity=2000, fetcher=yfinance_fetcher):
+        self.ticker = ticker
+        self.interval = interval
+        self.fetcher = fetcher
+        self.buffer = BarRingBuffer(capacity)
+        self._lock = threading.Lock()
+        self._last_poll = 0.0
+
+    def poll(self, min_poll=1.0):
+        """Fetch bars newer than the buffer's last bar unless another caller just did."""
+        with self._lock:
+            if time.monotonic() - self._last_poll < min_poll:
+                return 0
+            self._last_poll = time.monotonic()
+            if not len(self.buffer):
+                data = get_bars(self.ticker, self.interval, period="5d")
+            else:
+                data = self.fetcher(self.ticker, self.interval, start=self.buffer.last_time())
+            return self.buffer.extend(data)
+
+    def frame(self, since=None, inclusive=False):
+        with self._lock:
+            return self.buffer.frame(since, inclusive)
+
+
+_streams = OrderedDict()
+_streams_lock = threading.Lock()
+
+
+def get_stream(ticker, interval, capacity=2000, max_streams=64):
+    """The shared stream for (ticker, interval); least recently used streams are dropped past `max_streams`."""
+    key = (ticker, interval)
+    with _streams_lock:
+        stream = _streams.get(key)
+        if stream is None or stream.buffer.capacity != capacity:
+            stream = _streams[key] = BarStream(ticker, interval, capacity)
+        _streams.move_to_end(key)
+        while len(_streams) > max_streams:
+            _streams.popitem(last=False)
+        return stream
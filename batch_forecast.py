@@ -0,0 +1,204 @@
+# Headless forecasts for a whole watchlist, e.g. from a nightly cron job
+#
+#   python -m batch_forecast --watchlist watchlist.txt [--models prophet lstm] [--interval 1d]
+#                            [--periods 10] [--workers 4] [--output data/forecasts/2024-12-31]
+#   python -m batch_forecast --all-tickers --limit 500
+#
+# Each (model, ticker) forecast runs in a worker process and is written to its
+# own Parquet part under --output as soon as it finishes. Rerunning the same
+# command after a crash skips the parts that already exist. When the run ends
+# the parts are combined into forecasts.parquet, one row per forecast step, and
+# the pairs that failed are listed in failures.jsonl.
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+TICKERS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tickers.csv")
+BATCH_DIR = os.environ.get("BATCH_FORECAST_DIR", os.path.join("data", "forecasts"))
+MODELS = ["prophet", "lstm"]
+
+
+def load_watchlist(path):
+    """Tickers from a CSV with a Ticker column, or from a text file with one ticker per line."""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        first = f.readline()
+        f.seek(0)
+        if "Ticker" in next(csv.reader([first]), []):
+            tickers = [row["Ticker"] for row in csv.DictReader(f)]
+        else:
+            tickers = [line.split("#")[0] for line in f]
+    tickers = [ticker.strip() for ticker in tickers]
+    return list(dict.fromkeys(ticker for ticker in tickers if ticker))
+
+
+def part_path(output, model, ticker):
+    return os.path.join(output, "parts", model, quote(ticker, safe="") + ".parquet")
+
+
+def _future_index(last, periods, interval):
+    from prophet_forecast import FREQ
+
+    index = pd.date_range(last, periods=periods + 1, freq=FREQ.get(interval, interval))[1:]
+    # Same naive local timestamps as Prophet's ds column
+    return index.tz_localize(None) if index.tz is not None else index
+
+
+def forecast_ticker(model, ticker, interval, periods, column="Close", mode="recursive",
+                    uncertainty_samples=None, max_rows=None, store_models=False):
+    """Forecast one ticker with the same preparation as the Models page, as a frame with one row per step."""
+    from bar_store import get_bars
+
+    bars = get_bars(ticker, interval)
+    if bars.empty:
+        raise ValueError(f"No bars for {ticker} at interval {interval}")
+    data = bars.reset_index()
+    # Models are only kept in the registry on request; hundreds of tickers would
+    # otherwise evict the ones trained interactively
+    registry_ticker = ticker if store_models else None
+    if model == "prophet":
+        from prophet_forecast import forecast, prepare_history
+
+        history = prepare_history(data, column, max_rows=max_rows)
+        result = forecast(history, periods, interval, ticker=registry_ticker, column=column,
+                          notify=lambda message: None, future_only=True,
+                          uncertainty_samples=uncertainty_samples)
+        ds = result["ds"].to_numpy()
+        yhat = result["yhat"].to_numpy()
+        lower = result["yhat_lower"].to_numpy() if "yhat_lower" in result else np.full(len(yhat), np.nan)
+        upper = result["yhat_upper"].to_numpy() if "yhat_upper" in result else np.full(len(yhat), np.nan)
+    elif model == "lstm":
+        from lstm_forecast import forecast, prepare_series
+        from lstm_tuning import tuned_params
+
+        series = prepare_series(data, column)
+        # forecast() looks the tuned settings up itself when given the ticker; without
+        # one (models not stored) they are passed in
+        params = None if registry_ticker else tuned_params(ticker, interval, column)
+        yhat = forecast(series, periods, mode=mode, ticker=registry_ticker, interval=interval, column=column,
+                        params=params, notify=lambda message: None)
+        ds = _future_index(bars.index[-1], periods, interval)
+        lower = upper = np.full(len(yhat), np.nan)
+    else:
+        raise ValueError(f"Unknown model: {model}")
+    return pd.DataFrame({
+        "ticker": ticker,
+        "model": model,
+        "interval": interval,
+        "column": column,
+        "step": np.arange(1, len(yhat) + 1, dtype=np.int16),
+        "ds": ds,
+        "yhat": np.asarray(yhat, dtype=np.float32),
+        "yhat_lower": np.asarray(lower, dtype=np.float32),
+        "yhat_upper": np.asarray(upper, dtype=np.float32),
+    })
+
+
+def _write_part(output, model, ticker, interval, periods, options):
+    # Runs inside a worker process
+    result = forecast_ticker(model, ticker, interval, periods, **options)
+    path = part_path(output, model, ticker)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write next to the target and swap in so a crash never leaves a partial part behind
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        result.assign(created=pd.Timestamp.now()).to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return len(result)
+
+
+def combine(output, models, tickers):
+    """Concatenate the existing parts for `models` x `tickers` into forecasts.parquet."""
+    paths = [part_path(output, model, ticker) for model in models for ticker in tickers]
+    frames = [pd.read_parquet(path) for path in paths if os.path.exists(path)]
+    if not frames:
+        return None
+    combined = pd.concat(frames, ignore_index=True)
+    for name in ["ticker", "model", "interval", "column"]:
+        combined[name] = combined[name].astype("category")
+    path = os.path.join(output, "forecasts.parquet")
+    combined.to_parquet(path, index=False)
+    return path
+
+
+def run(tickers, models, interval="1d", periods=10, output=None, workers=None, progress=print, **options):
+    """Forecast every (model, ticker) pair without a part in `output`; returns the failed pairs."""
+    output = output or os.path.join(BATCH_DIR, time.strftime("%Y-%m-%d"))
+    pending = [
+        (model, ticker) for model in models for ticker in tickers
+        if not os.path.exists(part_path(output, model, ticker))
+    ]
+    done_before = len(models) * len(tickers) - len(pending)
+    if done_before:
+        progress(f"Resuming: {done_before} forecasts already in {output}")
+    failures = []
+    workers = workers or max(1, (os.cpu_count() or 2) // 2)
+    # The worker count bounds how many models train at once; spawn keeps
+    # TensorFlow state out of the workers
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context) as executor:
+        futures = {
+            executor.submit(_write_part, output, model, ticker, interval, periods, options): (model, ticker)
+            for model, ticker in pending
+        }
+        for finished, future in enumerate(as_completed(futures), 1):
+            model, ticker = futures[future]
+            try:
+                rows = future.result()
+                progress(f"[{finished}/{len(pending)}] {model} {ticker}: {rows} steps")
+            except Exception as e:
+                failures.append({"model": model, "ticker": ticker, "error": f"{type(e).__name__}: {e}"})
+                progress(f"[{finished}/{len(pending)}] {model} {ticker}: failed ({e})")
+    os.makedirs(output, exist_ok=True)
+    with open(os.path.join(output, "failures.jsonl"), "w") as f:
+        for failure in failures:
+            f.write(json.dumps(failure) + "\n")
+    path = combine(output, models, tickers)
+    if path is not None:
+        progress(f"Wrote {path}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Forecast a watchlist of tickers without the Streamlit app")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--watchlist", help="CSV with a Ticker column, or one ticker per line")
+    source.add_argument("--all-tickers", action="store_true", help="every ticker in tickers.csv")
+    parser.add_argument("--limit", type=int, help="only the first N tickers")
+    parser.add_argument("--models", nargs="+", default=["prophet"], choices=MODELS)
+    parser.add_argument("--interval", default="1d")
+    parser.add_argument("--periods", type=int, default=10)
+    parser.add_argument("--column", default="Close")
+    parser.add_argument("--mode", default="recursive", choices=["recursive", "direct"], help="LSTM rollout")
+    parser.add_argument("--uncertainty-samples", type=int, help="Prophet's interval draws (default 1000)")
+    parser.add_argument("--max-rows", type=int, help="fit Prophet on the latest N bars only")
+    parser.add_argument("--store-models", action="store_true", help="keep the fitted models in the registry")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--output", help=f"run directory, default {BATCH_DIR}/<today>; reuse it to resume")
+    args = parser.parse_args()
+
+    tickers = load_watchlist(args.watchlist or TICKERS_CSV)[:args.limit]
+    failures = run(
+        tickers, args.models, args.interval, args.periods, output=args.output, workers=args.workers,
+        column=args.column, mode=args.mode, uncertainty_samples=args.uncertainty_samples,
+        max_rows=args.max_rows, store_models=args.store_models,
+    )
+    if failures:
+        print(f"{len(failures)} forecasts failed; rerun the same command to retry them")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+# Cost of the analytics summary and its prompt size against the raw frame.
+#
+#   python -m benchmarks.analytics [rows]
+import sys
+import time
+
+from analytics import context, summarize
+from bar_store import flatten_columns
+from benchmarks.pipeline import synthetic_bars
+
+
+def compare(rows=5000):
+    """Cost of summarize() and the size of its prompt context against the frame the agent used to read."""
+    data = flatten_columns(synthetic_bars(rows, "1d")).reset_index()
+    started = time.perf_counter()
+    text = context(summarize(data, "1d"))
+    elapsed = time.perf_counter() - started
+    raw = data.tail(100).to_string()
+    print(f"summarize {rows} bars     {elapsed * 1000:9.1f} ms")
+    print(f"analytics context      {len(text):9d} chars (~{len(text) // 4} tokens)")
+    print(f"100 raw rows as text   {len(raw):9d} chars (~{len(raw) // 4} tokens)")
+
+
+if __name__ == "__main__":
+    compare(*(int(arg) for arg in sys.argv[1:2]))
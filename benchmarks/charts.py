@@ -0,0 +1,49 @@
+# Chart payload size and render time, full against downsampled series.
+#
+#   python -m benchmarks.charts [rows] [max_points]
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from charts import MAX_POINTS, downsample, render_png
+
+
+def compare(rows=500_000, max_points=MAX_POINTS):
+    """Downsampling cost, then payload size and render time of full and downsampled charts."""
+    rng = np.random.default_rng(0)
+    x = pd.date_range("2020-01-01", periods=rows, freq="min")
+    y = 100 + rng.standard_normal(rows).cumsum() * 0.05
+    series = {"full": (x, y)}
+    for method in ("lttb", "minmax"):
+        started = time.perf_counter()
+        series[method] = downsample(x, y, max_points, method=method)
+        elapsed = time.perf_counter() - started
+        print(f"{method:8s} {rows} -> {len(series[method][1])} points in {elapsed * 1000:8.1f} ms")
+    try:
+        from matplotlib.figure import Figure
+    except ImportError:
+        print("matplotlib not installed, skipping its render timings")
+    else:
+        fig = Figure(figsize=(10, 6))
+        for label, (sx, sy) in series.items():
+            fig.clear()
+            fig.subplots().plot(sx, sy)
+            started = time.perf_counter()
+            png = render_png(fig)
+            elapsed = time.perf_counter() - started
+            print(f"matplotlib {label:8s} {len(png) / 1024:9.1f} KiB png  {elapsed * 1000:8.1f} ms")
+    try:
+        import plotly.graph_objects as go
+    except ImportError:
+        print("plotly not installed, skipping its payload sizes")
+    else:
+        for label, (sx, sy) in series.items():
+            started = time.perf_counter()
+            payload = go.Figure(go.Scatter(x=sx, y=sy, mode="lines")).to_json()
+            print(f"plotly     {label:8s} {len(payload) / 1024:9.1f} KiB json {(time.perf_counter() - started) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    compare(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,50 @@
+# Answer latency of a fake LLM against memory, disk and near-duplicate cache hits.
+#
+#   python -m benchmarks.llm_cache [questions] [latency]
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from llm_cache import AnswerCache
+from model_registry import data_fingerprint
+
+
+def compare(questions=20, latency=0.5):
+    """Answer latency of a fake LLM taking `latency` seconds against memory, disk and near-duplicate hits."""
+    data = pd.DataFrame({"Close": np.random.default_rng(0).random(100)})
+    data_hash = data_fingerprint(data)
+    prompts = [f"What is the trend of the close over the last {n} days?" for n in range(questions)]
+
+    def fake_llm(prompt):
+        time.sleep(latency)
+        return f"Answer to: {prompt}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = AnswerCache(root=tmp, min_similarity=0.8)
+
+        def answer(prompt):
+            cached = cache.get("fake", data_hash, prompt)
+            if cached is None:
+                cached = fake_llm(prompt)
+                cache.put("fake", data_hash, prompt, cached)
+            return cached
+
+        runs = [
+            ("fake LLM", lambda prompt: answer(prompt)),
+            ("memory hit", lambda prompt: answer(prompt)),
+            ("disk hit", lambda prompt: (cache._memory.clear(), answer(prompt))),
+            ("near duplicate", lambda prompt: answer(prompt.replace("close", "close price"))),
+        ]
+        for label, func in runs:
+            started = time.perf_counter()
+            for prompt in prompts:
+                func(prompt)
+            print(f"{label:16s} {(time.perf_counter() - started) / questions * 1000:9.2f} ms per answer")
+        print(cache.stats())
+
+
+if __name__ == "__main__":
+    compare(*(float(arg) if i else int(arg) for i, arg in enumerate(sys.argv[1:3])))
@@ -0,0 +1,49 @@
+# LSTM forecast latency: one predict() per step against the compiled and direct rollouts.
+#
+#   python -m benchmarks.lstm_forecast [window_size]
+import sys
+import time
+
+import numpy as np
+
+from lstm_forecast import build_model, direct_forecast, recursive_forecast
+
+
+def loop_forecast(model, window, periods):
+    """Reference rollout: one model.predict call per step."""
+    future_pred = np.array(window, dtype="float32").reshape(-1, 1)
+    window_size = len(future_pred)
+    future_preds = []
+    for _ in range(periods):
+        next_pred = model.predict(future_pred.reshape(1, window_size, 1), verbose=0)
+        future_preds.append(next_pred[-1, 0])
+        future_pred = np.roll(future_pred, -1)
+        future_pred[-1] = next_pred[-1, 0]
+    return np.array(future_preds)
+
+
+def _time(func, repeat=3):
+    func()  # warm-up, includes graph tracing
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat
+
+
+def compare(window_size=30, periods_list=(10, 100, 365)):
+    """Forecast latency of the per-step loop against the compiled and direct modes."""
+    window = np.random.default_rng(0).random(window_size).astype("float32")
+    single = build_model(window_size)
+    for periods in periods_list:
+        direct = build_model(window_size, horizon=periods)
+        loop_time = _time(lambda: loop_forecast(single, window, periods), repeat=1)
+        recursive_time = _time(lambda: recursive_forecast(single, window, periods))
+        direct_time = _time(lambda: direct_forecast(direct, window, periods))
+        print(
+            f"periods={periods:4d}  loop {loop_time * 1000:9.1f} ms  "
+            f"recursive {recursive_time * 1000:8.1f} ms  direct {direct_time * 1000:8.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    compare(*(int(arg) for arg in sys.argv[1:2]))
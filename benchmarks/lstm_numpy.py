@@ -0,0 +1,37 @@
+# Recursive LSTM forecast latency of Keras against the NumPy inference engine.
+#
+#   python -m benchmarks.lstm_numpy [window_size] [periods] [tickers]
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from lstm_forecast import build_model, recursive_forecast
+from lstm_numpy import WEIGHTS_FILE, NumpyLSTM, export
+
+
+def compare(window_size=30, periods=10, tickers=16):
+    """Recursive forecast latency of Keras against the NumPy engine, one ticker and many stacked."""
+    class IdentityScaler:
+        min_, scale_ = np.zeros(1), np.ones(1)
+
+    model = build_model(window_size)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = NumpyLSTM.load(export(model, IdentityScaler(), os.path.join(tmp, WEIGHTS_FILE)))
+    series = np.random.default_rng(0).random((tickers, window_size))
+    timings = [
+        ("keras, 1 ticker", lambda: recursive_forecast(model, series[0], periods)),
+        ("numpy, 1 ticker", lambda: engine.forecast(series[0], periods)),
+        (f"numpy, {tickers} tickers stacked", lambda: NumpyLSTM.stack([engine] * tickers).forecast(series, periods)),
+    ]
+    for label, func in timings:
+        func()  # warm-up, includes graph tracing
+        started = time.perf_counter()
+        func()
+        print(f"{label:28s} {(time.perf_counter() - started) * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    compare(*(int(arg) for arg in sys.argv[1:4]))
@@ -0,0 +1,41 @@
+# Memory of the raw yf.download frame against the compact cached one.
+#
+#   python -m benchmarks.market_data [rows]
+import sys
+import tracemalloc
+
+from bar_store import flatten_columns
+from benchmarks.pipeline import synthetic_bars
+from lstm_forecast import prepare_series
+from market_data import compact
+from prophet_forecast import prepare_history
+
+
+def compare(rows=100_000, interval="5m", sessions=10):
+    """Memory of a yf.download frame against the compact one, for one frame and for `sessions` pages."""
+    raw = synthetic_bars(rows, interval).astype("float64")
+
+    def page(data):
+        # What the Models page derives from the shared frame for both models
+        data = data.reset_index()
+        return prepare_series(data, "Close"), prepare_history(data, "Close")
+
+    for label, make in [
+        ("yf.download frame", lambda: raw),
+        ("flattened float64", lambda: flatten_columns(raw.copy())),
+        ("compact", lambda: compact(flatten_columns(raw.copy()))),
+    ]:
+        data = make()
+        frame_mb = data.memory_usage(index=True, deep=True).sum() / 2**20
+        tracemalloc.start()
+        # Sessions of a process share the cached frame; each derives its own model inputs
+        derived = [page(flatten_columns(data.copy()) if label == "yf.download frame" else data)
+                   for _ in range(sessions)]
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del derived
+        print(f"{label:20s} frame {frame_mb:8.1f} MiB   {sessions} sessions' model inputs {peak / 2**20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    compare(*(int(arg) for arg in sys.argv[1:2]))
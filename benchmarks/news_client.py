@@ -0,0 +1,68 @@
+# News lookup latency against a local stub server: cold, TTL-cached, and archive plus incremental download.
+#
+#   python -m benchmarks.news_client [queries] [articles]
+import datetime
+import http.server
+import json
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import parse_qs, urlparse
+
+from news_client import NewsClient
+
+
+def compare(queries=20, articles=100):
+    """Lookup latency against a local stub server: cold, TTL-cached, and archive plus incremental download."""
+    today = datetime.date.today()
+
+    class Stub(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            params = {name: values[0] for name, values in parse_qs(urlparse(self.path).query).items()}
+            published = [
+                (datetime.datetime.combine(today, datetime.time(12)) - datetime.timedelta(hours=2 * i)).strftime(
+                    "%Y-%m-%dT%H:%M:%SZ")
+                for i in range(articles)
+            ]
+            body = json.dumps({"status": "ok", "articles": [
+                {"url": f"https://news.example/{params['q']}/{at}", "title": params["q"], "publishedAt": at,
+                 "description": "x" * 400, "source": {"name": "stub"}}
+                for at in published if at >= params["from"]
+            ]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Stub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/v2/everything"
+    start = today - datetime.timedelta(days=7)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            client = NewsClient("stub", url=url, archive_dir=tmp)
+            for label, prepare in [
+                ("cold", lambda: None),
+                ("TTL cache", lambda: None),
+                ("archive + incremental", client.invalidate),
+            ]:
+                prepare()
+                started = time.perf_counter()
+                for n in range(queries):
+                    client.everything(f"company-{n}", start, today)
+                elapsed = time.perf_counter() - started
+                print(f"{label:24s} {elapsed / queries * 1000:8.2f} ms per lookup")
+            print(client.stats())
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    compare(*(int(arg) for arg in sys.argv[1:3]))
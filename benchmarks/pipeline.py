@@ -0,0 +1,243 @@
+# Stage timings of the forecast pipeline on synthetic bars, without network access.
+#
+#   python -m benchmarks.pipeline [--sizes 1000 10000 100000 1000000] [--intervals 1d 5m]
+#                                 [--periods 10 100] [--models lstm prophet]
+#                                 [--mode recursive|direct] [--prophet-mode full|future]
+#                                 [--uncertainty-samples 1000]
+#                                 [--output results.jsonl] [--baseline previous.jsonl]
+#
+# Each configuration runs the same steps as the Models page and its worker jobs:
+#   fetch       bars from a synthetic yf.download through a fresh on-disk BarStore
+#   preprocess  reset_index plus prepare_series/scaling/windowing or prepare_history
+#   fit         train_model (LSTM) or Prophet.fit
+#   forecast    the recursive/direct rollout or Prophet's predict
+#   render      the page's result tables and matplotlib plots
+# Peak memory per stage is the tracemalloc peak of Python-side allocations, so
+# buffers owned by TensorFlow or Stan are not included; max_rss_mb covers those.
+# A configuration that fails, e.g. a daily fixture reaching back past the
+# installed pandas' datetime range, is reported as an error row.
+# With --baseline the exit status is 1 when any stage got slower than --tolerance.
+import argparse
+import gc
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStore, flatten_columns
+from prophet_forecast import FREQ
+
+STAGES = ["fetch", "preprocess", "fit", "forecast", "render"]
+TICKER = "SYN"
+
+
+def synthetic_bars(rows, interval="1d", ticker=TICKER, seed=0, end="2024-12-31 16:00"):
+    """A geometric random walk of OHLCV bars shaped like `yf.download(ticker, interval=interval)`.
+
+    Columns are (Price, Ticker) pairs; daily bars are indexed by a naive "Date",
+    intraday bars by a UTC "Datetime", as yfinance does.
+    """
+    rng = np.random.default_rng(seed)
+    if interval == "1d":
+        index = pd.bdate_range(end=pd.Timestamp(end).normalize(), periods=rows, name="Date")
+    else:
+        index = pd.date_range(end=pd.Timestamp(end, tz="UTC"), periods=rows,
+                              freq=FREQ.get(interval, interval), name="Datetime")
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, rows)))
+    open_ = np.concatenate([[close[0]], close[:-1]]) * np.exp(rng.normal(0.0, 0.002, rows))
+    spread = np.abs(rng.normal(0.0, 0.005, rows))
+    prices = {
+        "Close": close,
+        "High": np.maximum(open_, close) * (1.0 + spread),
+        "Low": np.minimum(open_, close) * (1.0 - spread),
+        "Open": open_,
+        "Volume": rng.integers(10_000, 5_000_000, rows).astype(np.int64),
+    }
+    columns = pd.MultiIndex.from_tuples([(name, ticker) for name in prices], names=["Price", "Ticker"])
+    return pd.DataFrame(dict(zip(columns, prices.values())), index=index)
+
+
+def synthetic_fetcher(rows, seed=0):
+    """A BarStore fetcher serving `rows` synthetic bars per ticker and interval."""
+    def fetch(ticker, interval, start=None):
+        data = flatten_columns(synthetic_bars(rows, interval, ticker, seed))
+        return data if start is None else data[data.index >= start]
+    return fetch
+
+
+class _Stages:
+    """Wall time and Python peak memory of consecutive pipeline stages."""
+
+    def __init__(self):
+        self.results = []
+
+    def run(self, stage, func, *args, **kwargs):
+        gc.collect()
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        started = time.perf_counter()
+        result = func(*args, **kwargs)
+        seconds = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        self.results.append({"stage": stage, "seconds": seconds, "peak_mb": (peak - before) / 2**20})
+        return result
+
+
+def _lstm(stages, data, interval, periods, params, mode):
+    from LSTM import show_lstm_forecast
+    from backends import load
+    from lstm_forecast import direct_forecast, prepare_series, recursive_forecast, train_model
+    from windowing import sliding_windows
+
+    params = dict(params, horizon=periods if mode == "direct" else 1)
+
+    def preprocess():
+        series = prepare_series(data.reset_index(), "Close")
+        scaler = load("sklearn").MinMaxScaler()
+        scaled = scaler.fit_transform(series.values.reshape(-1, 1)).ravel()
+        sliding_windows(scaled, params["window_size"], horizon=params["horizon"])
+        return scaler, scaled
+
+    def predict(model):
+        window = scaled[-params["window_size"]:]
+        rollout = direct_forecast if mode == "direct" else recursive_forecast
+        return scaler.inverse_transform(np.asarray(rollout(model, window, periods)).reshape(-1, 1)).ravel()
+
+    scaler, scaled = stages.run("preprocess", preprocess)
+    model = stages.run("fit", train_model, scaled, params)
+    future_preds = stages.run("forecast", predict, model)
+    stages.run("render", show_lstm_forecast, future_preds, "Close", periods)
+
+
+def _prophet(stages, data, interval, periods, mode, uncertainty_samples):
+    from prophet_forecast import fit_model, predict, prepare_history
+    from prophet_method import show_prophet_forecast
+
+    history = stages.run("preprocess", lambda: prepare_history(data.reset_index(), "Close"))
+    model = stages.run("fit", fit_model, history, interval, notify=lambda message: None)
+    forecast = stages.run("forecast", predict, model, periods, interval, future_only=mode == "future",
+                          uncertainty_samples=uncertainty_samples)
+    stages.run("render", show_prophet_forecast, forecast, history, "Close")
+
+
+def run_one(model, rows, interval, periods, params, mode="recursive", seed=0, uncertainty_samples=None):
+    """Stage results of one configuration, each a dict with stage, seconds and peak_mb.
+
+    `mode` is "recursive" or "direct" for the LSTM and "full" or "future" for Prophet.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    stages = _Stages()
+    tracing = not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    try:
+        with tempfile.TemporaryDirectory() as root:
+            store = BarStore(root, fetcher=synthetic_fetcher(rows, seed))
+            data = stages.run("fetch", store.get, TICKER, interval)
+            if model == "lstm":
+                _lstm(stages, data, interval, periods, params, mode)
+            else:
+                _prophet(stages, data, interval, periods, mode, uncertainty_samples)
+    finally:
+        plt.close("all")
+        if tracing:
+            tracemalloc.stop()
+    return stages.results
+
+
+def run(models, sizes, intervals, periods_list, params, mode="recursive", prophet_mode="full",
+        uncertainty_samples=None):
+    results = []
+    for model in models:
+        model_mode = mode if model == "lstm" else prophet_mode
+        for rows in sizes:
+            for interval in intervals:
+                for periods in periods_list:
+                    config = {"model": model, "mode": model_mode, "rows": rows, "interval": interval,
+                              "periods": periods}
+                    if model == "prophet" and uncertainty_samples is not None:
+                        config["uncertainty_samples"] = uncertainty_samples
+                    try:
+                        stages = run_one(model, rows, interval, periods, params, model_mode,
+                                         uncertainty_samples=uncertainty_samples)
+                    except Exception as e:
+                        results.append(dict(config, stage="error", error=f"{type(e).__name__}: {e}"))
+                        continue
+                    max_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+                    results.extend(dict(config, max_rss_mb=max_rss_mb, **stage) for stage in stages)
+    return results
+
+
+def _key(row):
+    return (row["model"], row.get("mode"), row.get("uncertainty_samples"), row["rows"], row["interval"],
+            row["periods"], row["stage"])
+
+
+def _load(path):
+    with open(path) as f:
+        return {_key(row): row for row in map(json.loads, f)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time each stage of the forecast pipeline on synthetic bars")
+    parser.add_argument("--models", nargs="+", default=["lstm", "prophet"], choices=["lstm", "prophet"])
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1_000, 10_000, 100_000])
+    parser.add_argument("--intervals", nargs="+", default=["1d", "5m"])
+    parser.add_argument("--periods", nargs="+", type=int, default=[10, 100])
+    parser.add_argument("--mode", default="recursive", choices=["recursive", "direct"], help="LSTM rollout")
+    parser.add_argument("--prophet-mode", default="full", choices=["full", "future"],
+                        help="predict the history plus the horizon, or the horizon only")
+    parser.add_argument("--uncertainty-samples", type=int, help="Prophet's interval draws (default 1000)")
+    parser.add_argument("--epochs", type=int, default=1, help="LSTM training epochs (the app uses 10)")
+    parser.add_argument("--output", help="append results as JSON lines to this file")
+    parser.add_argument("--baseline", help="JSON lines from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="relative slowdown against the baseline reported as a regression")
+    args = parser.parse_args()
+
+    os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+    from lstm_forecast import DEFAULT_PARAMS
+
+    params = dict(DEFAULT_PARAMS, epochs=args.epochs)
+    stamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+    results = [
+        dict(row, timestamp=stamp)
+        for row in run(args.models, args.sizes, args.intervals, args.periods, params, args.mode,
+                       args.prophet_mode, args.uncertainty_samples)
+    ]
+    baseline = _load(args.baseline) if args.baseline else {}
+    regressions = 0
+    for row in results:
+        line = (f"{row['model']:8s} {row['mode']:9s} {row['rows']:>9d} {row['interval']:4s} "
+                f"{row['periods']:>5d} {row['stage']:10s}")
+        if row["stage"] == "error":
+            print(f"{line} {row['error']}")
+            continue
+        line += f" {row['seconds']:9.3f} s {row['peak_mb']:9.1f} MiB"
+        before = baseline.get(_key(row))
+        if before is not None:
+            line += f"  ({row['seconds'] - before['seconds']:+.3f} s, {row['peak_mb'] - before['peak_mb']:+.1f} MiB)"
+            if row["seconds"] > before["seconds"] * (1 + args.tolerance) and row["seconds"] - before["seconds"] > 0.01:
+                line += "  REGRESSION"
+                regressions += 1
+        print(line)
+    if args.output:
+        with open(args.output, "a") as f:
+            for row in results:
+                f.write(json.dumps(row) + "\n")
+    if regressions:
+        print(f"{regressions} stage(s) slower than the baseline by more than {args.tolerance:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+# Prophet predict() latency over history plus horizon against the future-only variants.
+#
+#   python -m benchmarks.prophet_forecast [rows] [periods]
+import sys
+import time
+
+from bar_store import flatten_columns
+from benchmarks.pipeline import synthetic_bars
+from prophet_forecast import fit_model, predict, prepare_history
+
+
+def compare(rows=5000, periods=30, interval="5m"):
+    """predict() latency over history plus horizon against the future-only variants."""
+    history = prepare_history(flatten_columns(synthetic_bars(rows, interval)).reset_index(), "Close")
+    model = fit_model(history, interval)
+    variants = [
+        ("history + future", {}),
+        ("future only", {"future_only": True}),
+        ("future only, 100 samples", {"future_only": True, "uncertainty_samples": 100}),
+        ("future only, no intervals", {"future_only": True, "uncertainty_samples": 0}),
+    ]
+    for label, kwargs in variants:
+        started = time.perf_counter()
+        predict(model, periods, interval, **kwargs)
+        print(f"{label:26s} {(time.perf_counter() - started) * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    compare(*(int(arg) for arg in sys.argv[1:3]))
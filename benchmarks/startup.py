@@ -0,0 +1,108 @@
+# Startup time and memory of every page, each measured in a fresh interpreter.
+#
+#   python -m benchmarks.startup [--output results.jsonl] [--baseline previous.jsonl]
+#
+# Pages are executed with streamlit's AppTest, so no server or browser is needed.
+# Pages that download bars include that time unless the bar store is already warm.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = [
+    "home.py",
+    "pages/Models.py",
+    "pages/Ollama.py",
+    "pages/StockTrend_With_News.py",
+    "pages/News.py",
+    "pages/Stock_Graph(Testing).py",
+]
+HEAVY_MODULES = ["tensorflow", "prophet", "sklearn", "langchain_groq", "langchain_experimental"]
+
+_PAGE_SNIPPET = """
+import json, resource, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+AppTest.from_file({path!r}, default_timeout={timeout}).run()
+finished = time.perf_counter()
+print(json.dumps({{
+    "streamlit_import_s": imported - started,
+    "run_s": finished - imported,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy_modules": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+_BACKEND_SNIPPET = """
+import json, resource, time
+started = time.perf_counter()
+from backends import load
+load({name!r})
+print(json.dumps({{
+    "import_s": time.perf_counter() - started,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}}))
+"""
+
+
+def _measure(snippet):
+    env = dict(os.environ, WARM_UP_BACKENDS="0")
+    completed = subprocess.run(
+        [sys.executable, "-c", snippet], cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1:]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run(timeout=60):
+    results = []
+    for name in ["tensorflow", "prophet", "sklearn", "langchain_groq", "langchain_agents"]:
+        results.append(dict(kind="backend", name=name, **_measure(_BACKEND_SNIPPET.format(name=name))))
+    for path in PAGES:
+        snippet = _PAGE_SNIPPET.format(path=path, timeout=timeout, heavy=HEAVY_MODULES)
+        results.append(dict(kind="page", name=path, **_measure(snippet)))
+    return results
+
+
+def _load(path):
+    with open(path) as f:
+        return {(row["kind"], row["name"]): row for row in map(json.loads, f)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure page startup time and memory")
+    parser.add_argument("--output", help="append results as JSON lines to this file")
+    parser.add_argument("--baseline", help="JSON lines from an earlier run to compare against")
+    parser.add_argument("--timeout", type=int, default=60)
+    args = parser.parse_args()
+
+    stamp = time.strftime("%Y-%m-%dT%H:%M:%S")
+    results = [dict(row, timestamp=stamp) for row in run(args.timeout)]
+    baseline = _load(args.baseline) if args.baseline else {}
+    for row in results:
+        seconds = row.get("run_s", row.get("import_s"))
+        line = f"{row['kind']:8s} {row['name']:32s}"
+        if seconds is None:
+            print(f"{line} failed: {row.get('error')}")
+            continue
+        line += f" {seconds:8.2f} s {row['max_rss_mb']:8.0f} MiB"
+        if row.get("heavy_modules"):
+            line += f"  loads {', '.join(row['heavy_modules'])}"
+        before = baseline.get((row["kind"], row["name"]))
+        if before is not None and before.get("max_rss_mb"):
+            before_seconds = before.get("run_s", before.get("import_s"))
+            line += f"  ({seconds - before_seconds:+.2f} s, {row['max_rss_mb'] - before['max_rss_mb']:+.0f} MiB)"
+        print(line)
+    if args.output:
+        with open(args.output, "a") as f:
+            for row in results:
+                f.write(json.dumps(row) + "\n")
+
+
+if __name__ == "__main__":
+    main()
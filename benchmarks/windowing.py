@@ -0,0 +1,44 @@
+# Time and peak memory of the list-append window builder against the strided views.
+#
+#   python -m benchmarks.windowing [rows] [window_size]
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from windowing import sliding_windows
+
+
+def _loop_windows(data, window_size):
+    # The original list-append implementation from LSTM_func, kept for comparison
+    X, y = [], []
+    for i in range(len(data) - window_size):
+        X.append(data[i:i + window_size])
+        y.append(data[i + window_size])
+    return np.array(X), np.array(y)
+
+
+def _measure(func, *args):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def compare(n_rows=200_000, window_size=30):
+    """Time and peak memory of the loop builder against the strided views."""
+    series = np.random.default_rng(0).random(n_rows)
+    (X_loop, y_loop), loop_time, loop_peak = _measure(_loop_windows, series, window_size)
+    (X_view, y_view), view_time, view_peak = _measure(sliding_windows, series, window_size)
+    assert np.array_equal(X_loop, X_view[:, :, 0]) and np.array_equal(y_loop, y_view)
+    print(f"rows={n_rows} window={window_size}")
+    print(f"loop:    {loop_time * 1000:10.1f} ms  peak {loop_peak / 2**20:8.1f} MiB")
+    print(f"strided: {view_time * 1000:10.1f} ms  peak {view_peak / 2**20:8.1f} MiB")
+
+
+if __name__ == "__main__":
+    compare(*(int(arg) for arg in sys.argv[1:3]))
@@ -0,0 +1,152 @@
+# Server-side downsampling and reusable figures for the app's charts
+#
+# A chart is a few hundred pixels wide, so sending every bar of a long series
+# only makes the payload and the browser slow. lttb() keeps the points that
+# preserve a line's visual shape (Largest-Triangle-Three-Buckets); minmax()
+# keeps each bucket's extremes, so no spike disappears; envelope() does the same
+# for a lower/upper band. Slicing to the visible range before downsampling gives
+# full resolution again when zoomed in.
+#
+# Matplotlib figures are built with the object-oriented API and kept per session
+# and chart, cleared and redrawn on reuse, so no pyplot global state builds up.
+import io
+
+import numpy as np
+
+import tracing
+from tracing import span
+
+MAX_POINTS = 2000
+
+
+def _numeric(x):
+    x = np.asarray(x)
+    if x.dtype.kind == "M":
+        return x.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+    if x.dtype.kind == "O":
+        # e.g. a tz-aware DatetimeIndex as Timestamps
+        import pandas as pd
+
+        return pd.DatetimeIndex(x).asi8.astype(np.float64)
+    return x.astype(np.float64)
+
+
+def _take(values, positions):
+    return values.iloc[positions] if hasattr(values, "iloc") else values[positions]
+
+
+def lttb(x, y, max_points=MAX_POINTS):
+    """Positions of the points that keep the shape of the line through (x, y), first and last included."""
+    n = len(y)
+    if n <= max_points or max_points < 3:
+        return np.arange(n)
+    x, y = _numeric(x), np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    # Averages of every bucket, computed up front from cumulative sums
+    cx, cy = np.concatenate([[0.0], np.cumsum(x)]), np.concatenate([[0.0], np.cumsum(y)])
+    sizes = edges[1:] - edges[:-1]
+    mean_x = (cx[edges[1:]] - cx[edges[:-1]]) / sizes
+    mean_y = (cy[edges[1:]] - cy[edges[:-1]]) / sizes
+    mean_x = np.append(mean_x, x[-1])
+    mean_y = np.append(mean_y, y[-1])
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        # Point of this bucket forming the largest triangle with the previous pick and the next bucket's average
+        area = np.abs((x[a] - mean_x[i + 1]) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (mean_y[i + 1] - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def _buckets(values, n_buckets, fill):
+    size = -(-len(values) // n_buckets)
+    padded = np.full(size * n_buckets, fill)
+    padded[:len(values)] = values
+    return padded.reshape(n_buckets, size), size
+
+
+def minmax(y, max_points=MAX_POINTS):
+    """Positions of the minimum and maximum of each of max_points / 2 buckets, in order."""
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    n_buckets = max_points // 2
+    low, size = _buckets(np.where(np.isnan(y), np.inf, y), n_buckets, np.inf)
+    high, _ = _buckets(np.where(np.isnan(y), -np.inf, y), n_buckets, -np.inf)
+    offsets = np.arange(n_buckets) * size
+    positions = np.concatenate([offsets + low.argmin(axis=1), offsets + high.argmax(axis=1)])
+    return np.unique(positions[positions < n])
+
+
+def envelope(x, lower, upper, max_points=MAX_POINTS):
+    """(x, lower, upper) of a band reduced to the bucket-wise min of `lower` and max of `upper`."""
+    n = len(lower)
+    if n <= max_points:
+        return x, lower, upper
+    low, size = _buckets(np.asarray(lower, dtype=np.float64), max_points, np.nan)
+    high, _ = _buckets(np.asarray(upper, dtype=np.float64), max_points, np.nan)
+    starts = np.arange(0, n, size)
+    return _take(x, starts), np.nanmin(low[:len(starts)], axis=1), np.nanmax(high[:len(starts)], axis=1)
+
+
+def visible(x, x_range):
+    """Positions of the points of x inside x_range = (start, end); None leaves a side open."""
+    x = _numeric(x)
+    start, end = x_range
+    lo = 0 if start is None else int(np.searchsorted(x, _numeric([start])[0], side="left"))
+    hi = len(x) if end is None else int(np.searchsorted(x, _numeric([end])[0], side="right"))
+    return np.arange(lo, hi)
+
+
+def downsample(x, y, max_points=MAX_POINTS, method="lttb", x_range=None):
+    """(x, y) of at most `max_points` points, optionally of the visible range only; NaNs are dropped."""
+    positions = np.arange(len(y)) if x_range is None else visible(x, x_range)
+    values = np.asarray(y, dtype=np.float64)[positions]
+    positions = positions[~np.isnan(values)]
+    x, y = _take(x, positions), _take(y, positions)
+    keep = lttb(x, y, max_points) if method == "lttb" else minmax(y, max_points)
+    return _take(x, keep), _take(y, keep)
+
+
+def figure(key, figsize=(10, 6)):
+    """A cleared (figure, axes) pair reused by this session for chart `key`."""
+    import streamlit as st
+    from matplotlib.figure import Figure
+
+    figures = st.session_state.setdefault("_figures", {})
+    fig = figures.get(key)
+    if fig is None or tuple(fig.get_size_inches()) != tuple(figsize):
+        fig = figures[key] = Figure(figsize=figsize)
+    fig.clear()
+    return fig, fig.subplots()
+
+
+def render_png(fig, dpi=100):
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+    return buffer.getvalue()
+
+
+def show(fig, container=None, chart=""):
+    """Draw a matplotlib figure in Streamlit as a PNG, timing the render and recording its size."""
+    import streamlit as st
+
+    with span("chart.render", chart=chart, kind="matplotlib") as stage:
+        png = render_png(fig)
+        stage.set(bytes=len(png), points=sum(len(line.get_xdata()) for ax in fig.axes for line in ax.get_lines()))
+    (container or st).image(png)
+
+
+def show_plotly(fig, container=None, chart=""):
+    """Send a Plotly figure to the browser; with tracing on, its JSON payload size is recorded."""
+    import streamlit as st
+
+    with span("chart.render", chart=chart, kind="plotly") as stage:
+        if tracing.ENABLED:
+            stage.set(bytes=len(fig.to_json()), points=sum(len(trace.y) for trace in fig.data))
+        (container or st).plotly_chart(fig, use_container_width=True)
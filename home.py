@@ -1,4 +1,7 @@
+import os
 import streamlit as st
+from backends import warm_up
+from jobs import get_job_manager
 
 # Set page configuration
 st.set_page_config(
@@ -69,6 +72,12 @@ st.markdown(
 ✨ Developed to simplify your stock analysis journey. Whether you're a beginner or a seasoned trader, this app is for you!
 """
 )
+# Once the page has been drawn, start importing the heavy frameworks in the
+# background: LangChain for the LLM pages here, TensorFlow/Prophet in the
+# training workers. Set WARM_UP_BACKENDS=0 to skip.
+if os.environ.get("WARM_UP_BACKENDS", "1") != "0":
+    warm_up("langchain_groq", "langchain_agents", "langchain_messages", "langchain_callbacks")
+    get_job_manager().warm_up("tensorflow", "prophet")
 
  
 
@@ -0,0 +1,275 @@
+# Technical indicators with matching streaming and batch implementations
+#
+# Every indicator has a stateful class whose update() costs O(1) per new bar
+# (O(window) for the windowed ones) and a batch function over NumPy arrays for
+# backfills. The classes' extend() feeds a whole array at batch speed, e.g. to
+# bring a fresh state up to the end of the history before streaming. Both paths
+# do the same floating point operations in the same order, so they agree bit
+# for bit:
+# - recursive smoothing (EMA, Wilder) runs through scipy's lfilter kernel in
+#   both paths, the streaming one simply feeds it one sample at a time;
+# - window sums add the window's values left to right, one NumPy column at a
+#   time in the batch path and one float at a time when streaming.
+from collections import deque
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+
+def _window_sum(windows):
+    total = windows[:, 0].copy()
+    for j in range(1, windows.shape[1]):
+        total += windows[:, j]
+    return total
+
+
+def _smoothing(alpha):
+    return np.array([alpha, 0.0]), np.array([1.0, -(1.0 - alpha)])
+
+
+def _padded(values, window, result):
+    out = np.full(len(values), np.nan)
+    out[window - 1:] = result
+    return out
+
+
+# Simple moving average
+
+def sma(values, window):
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < window:
+        return np.full(len(values), np.nan)
+    return _padded(values, window, _window_sum(sliding_window_view(values, window)) / window)
+
+
+class SMA:
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        out = sma(np.concatenate([list(self.values), values]), self.window)[len(self.values):]
+        self.values.extend(values[-self.window:].tolist())
+        return out
+
+    def update(self, value):
+        self.values.append(float(value))
+        if len(self.values) < self.window:
+            return np.nan
+        total = self.values[0]
+        for value in list(self.values)[1:]:
+            total += value
+        return total / self.window
+
+
+# Exponential moving average, seeded with the first value (pandas' adjust=False)
+
+def _alpha(span, alpha):
+    return alpha if alpha is not None else 2.0 / (span + 1.0)
+
+
+def ema(values, span=None, alpha=None):
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return values.copy()
+    alpha = _alpha(span, alpha)
+    b, a = _smoothing(alpha)
+    out, _ = lfilter(b, a, values, zi=values[:1] * (1.0 - alpha))
+    return out
+
+
+class EMA:
+    def __init__(self, span=None, alpha=None):
+        self.alpha = _alpha(span, alpha)
+        self.b, self.a = _smoothing(self.alpha)
+        self.state = None
+        self.value = np.nan
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return values.copy()
+        if self.state is None:
+            self.state = values[:1] * (1.0 - self.alpha)
+        out, self.state = lfilter(self.b, self.a, values, zi=self.state)
+        self.value = out[-1]
+        return out
+
+    def update(self, value):
+        sample = np.array([value], dtype=np.float64)
+        if self.state is None:
+            self.state = sample * (1.0 - self.alpha)
+        out, self.state = lfilter(self.b, self.a, sample, zi=self.state)
+        self.value = out[0]
+        return self.value
+
+
+# MACD line and signal line
+
+def macd(values, fast=12, slow=26, signal=9):
+    line = ema(values, span=fast) - ema(values, span=slow)
+    return line, ema(line, span=signal)
+
+
+class MACD:
+    def __init__(self, fast=12, slow=26, signal=9):
+        self.fast, self.slow, self.signal = EMA(span=fast), EMA(span=slow), EMA(span=signal)
+
+    def extend(self, values):
+        line = self.fast.extend(values) - self.slow.extend(values)
+        return line, self.signal.extend(line)
+
+    def update(self, value):
+        line = self.fast.update(value) - self.slow.update(value)
+        return line, self.signal.update(line)
+
+
+# Wilder's RSI: gains and losses smoothed with alpha = 1 / window
+
+def _rsi(avg_gain, avg_loss):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return np.where(avg_loss == 0.0, 100.0, rsi)
+
+
+def rsi(values, window=14):
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if len(values) < 2:
+        return out
+    delta = np.diff(values)
+    gain = np.where(delta > 0.0, delta, 0.0)
+    loss = np.where(delta < 0.0, -delta, 0.0)
+    out[1:] = _rsi(ema(gain, alpha=1.0 / window), ema(loss, alpha=1.0 / window))
+    return out
+
+
+class RSI:
+    def __init__(self, window=14):
+        self.gain, self.loss = EMA(alpha=1.0 / window), EMA(alpha=1.0 / window)
+        self.previous = None
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        out = np.full(len(values), np.nan)
+        if not len(values):
+            return out
+        if self.previous is None:
+            delta, first = np.diff(values), 1
+        else:
+            delta, first = np.diff(values, prepend=self.previous), 0
+        self.previous = float(values[-1])
+        if len(delta):
+            gain = np.where(delta > 0.0, delta, 0.0)
+            loss = np.where(delta < 0.0, -delta, 0.0)
+            out[first:] = _rsi(self.gain.extend(gain), self.loss.extend(loss))
+        return out
+
+    def update(self, value):
+        value = float(value)
+        previous, self.previous = self.previous, value
+        if previous is None:
+            return np.nan
+        delta = value - previous
+        avg_gain = self.gain.update(delta if delta > 0.0 else 0.0)
+        avg_loss = self.loss.update(-delta if delta < 0.0 else 0.0)
+        return float(_rsi(np.float64(avg_gain), np.float64(avg_loss)))
+
+
+# Bollinger bands: (middle, upper, lower) with the population standard deviation
+
+def bollinger(values, window=20, k=2.0):
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < window:
+        empty = np.full(len(values), np.nan)
+        return empty, empty.copy(), empty.copy()
+    windows = sliding_window_view(values, window)
+    mean = _window_sum(windows) / window
+    deviation = windows - mean[:, None]
+    std = np.sqrt(_window_sum(deviation * deviation) / window)
+    return (
+        _padded(values, window, mean),
+        _padded(values, window, mean + k * std),
+        _padded(values, window, mean - k * std),
+    )
+
+
+class Bollinger:
+    def __init__(self, window=20, k=2.0):
+        self.window, self.k = window, k
+        self.values = deque(maxlen=window)
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        bands = bollinger(np.concatenate([list(self.values), values]), self.window, self.k)
+        self.values.extend(values[-self.window:].tolist())
+        return tuple(band[len(bands[0]) - len(values):] for band in bands)
+
+    def update(self, value):
+        self.values.append(float(value))
+        if len(self.values) < self.window:
+            return np.nan, np.nan, np.nan
+        window = list(self.values)
+        total = window[0]
+        for value in window[1:]:
+            total += value
+        mean = total / self.window
+        squares = (window[0] - mean) * (window[0] - mean)
+        for value in window[1:]:
+            squares += (value - mean) * (value - mean)
+        std = float(np.sqrt(squares / self.window))
+        return mean, mean + self.k * std, mean - self.k * std
+
+
+# Average true range with Wilder smoothing
+
+def atr(high, low, close, window=14):
+    high, low, close = (np.asarray(x, dtype=np.float64) for x in (high, low, close))
+    if not len(close):
+        return close.copy()
+    true_range = high - low
+    previous = close[:-1]
+    true_range[1:] = np.maximum(
+        true_range[1:], np.maximum(np.abs(high[1:] - previous), np.abs(low[1:] - previous))
+    )
+    return ema(true_range, alpha=1.0 / window)
+
+
+class ATR:
+    def __init__(self, window=14):
+        self.average = EMA(alpha=1.0 / window)
+        self.previous_close = None
+
+    def extend(self, high, low, close):
+        high, low, close = (np.asarray(x, dtype=np.float64) for x in (high, low, close))
+        if not len(close):
+            return close.copy()
+        first_close = np.nan if self.previous_close is None else self.previous_close
+        previous = np.concatenate([[first_close], close[:-1]])
+        gap = np.maximum(np.abs(high - previous), np.abs(low - previous))
+        # The very first bar has no previous close; its true range is high - low
+        true_range = np.where(np.isnan(previous), high - low, np.maximum(high - low, gap))
+        self.previous_close = float(close[-1])
+        return self.average.extend(true_range)
+
+    def update(self, high, low, close):
+        true_range = float(high) - float(low)
+        if self.previous_close is not None:
+            true_range = max(true_range, abs(high - self.previous_close), abs(low - self.previous_close))
+        self.previous_close = float(close)
+        return self.average.update(true_range)
+
+
+def compute_indicators(data):
+    """Indicator columns for an OHLC frame, as a new frame with the same index."""
+    close = data["Close"].to_numpy(dtype=np.float64)
+    line, signal = macd(close)
+    middle, upper, lower = bollinger(close)
+    columns = {"MA20": middle, "RSI": rsi(close), "MACD": line, "MACD Signal": signal,
+               "BB Upper": upper, "BB Lower": lower}
+    if {"High", "Low"} <= set(data.columns):
+        columns["ATR"] = atr(data["High"].to_numpy(), data["Low"].to_numpy(), close)
+    return pd.DataFrame(columns, index=data.index)
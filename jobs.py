@@ -0,0 +1,258 @@
+# Background training/forecast jobs so Streamlit reruns never wait on model.fit
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+
+import streamlit as st
+
+import tracing
+from backends import load
+from model_registry import data_fingerprint
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def _make_callback(job_id, progress, cancelled):
+    from tensorflow.keras.callbacks import Callback
+
+    class JobCallback(Callback):
+        def on_epoch_end(self, epoch, logs=None):
+            progress[job_id] = (epoch + 1) / self.params["epochs"]
+
+        def on_train_batch_end(self, batch, logs=None):
+            # Raising leaves fit() and forecast() before the half-trained model
+            # can be stored in the registry
+            if cancelled.get(job_id):
+                raise JobCancelled(job_id)
+
+    return JobCallback()
+
+
+def _run(kind, data, kwargs, job_id, progress, messages, cancelled, spans):
+    # Runs inside a worker process
+    def notify(message):
+        messages[job_id] = messages.get(job_id, []) + [message]
+
+    # Spans recorded here are handed back to the page that shows the result
+    with tracing.capture() as captured:
+        try:
+            with tracing.span("job", kind=kind, job=job_id[:12], rows=len(data), **kwargs):
+                if kind == "lstm":
+                    from lstm_forecast import forecast
+
+                    callback = _make_callback(job_id, progress, cancelled)
+                    result = forecast(data, callbacks=[callback], notify=notify, **kwargs)
+                elif kind == "lstm_multi":
+                    from lstm_forecast import forecast_multivariate
+
+                    callback = _make_callback(job_id, progress, cancelled)
+                    result = forecast_multivariate(data, callbacks=[callback], notify=notify, **kwargs)
+                elif kind == "prophet":
+                    from prophet_forecast import forecast
+
+                    # A running fit can't be interrupted; a cancel only keeps its model out of the registry
+                    result = forecast(data, notify=notify, cancelled=lambda: cancelled.get(job_id), **kwargs)
+                else:
+                    raise ValueError(f"Unknown job kind: {kind}")
+        finally:
+            if captured:
+                spans[job_id] = captured
+    if cancelled.get(job_id):
+        raise JobCancelled(job_id)
+    progress[job_id] = 1.0
+    return result
+
+
+def _warm_up(names):
+    # Runs inside a worker process
+    for name in names:
+        load(name)
+
+
+class JobManager:
+    """Process pool owning training and forecasting jobs.
+
+    Identical submissions (same kind, arguments and input data) share one job.
+    Progress and status messages live in manager dicts the pages poll.
+    """
+
+    def __init__(self, max_workers=None, keep_finished=32):
+        context = multiprocessing.get_context("spawn")
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) // 2)
+        self.keep_finished = keep_finished
+        self._executor = ProcessPoolExecutor(self.max_workers, mp_context=context)
+        self._manager = context.Manager()
+        self._progress = self._manager.dict()
+        self._messages = self._manager.dict()
+        self._cancelled = self._manager.dict()
+        self._spans = self._manager.dict()
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._warmed = False
+
+    def warm_up(self, *names):
+        """Start the worker processes and import `names` in them before the first real job."""
+        with self._lock:
+            if self._warmed:
+                return
+            self._warmed = True
+        for _ in range(self.max_workers):
+            self._executor.submit(_warm_up, names)
+
+    def job_id(self, kind, data, kwargs):
+        spec = {"kind": kind, "kwargs": kwargs, "data": data_fingerprint(data)}
+        return hashlib.sha1(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()
+
+    def submit(self, kind, data, **kwargs):
+        """Queue a job and return its id; an identical queued, running or finished job is reused."""
+        job_id = self.job_id(kind, data, kwargs)
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and self._reusable(job_id, job["future"]):
+                self._jobs.move_to_end(job_id)
+                return job_id
+            self._cancelled.pop(job_id, None)
+            self._progress[job_id] = 0.0
+            self._messages[job_id] = []
+            future = self._executor.submit(
+                _run, kind, data, kwargs, job_id, self._progress, self._messages, self._cancelled, self._spans
+            )
+            self._jobs[job_id] = {"kind": kind, "future": future, "submitted": time.time(),
+                                  "args": (kind, data, kwargs)}
+            self._prune()
+        return job_id
+
+    def _reusable(self, job_id, future):
+        # Failed jobs are run again on the next identical submission; cancelled
+        # ones stay cancelled until restart(), so the rerun after Cancel shows it
+        if future.cancelled() or self._cancelled.get(job_id):
+            return True
+        return not future.done() or future.exception() is None
+
+    def restart(self, job_id):
+        """Submit a cancelled or failed job again; returns the (same) job id."""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job is None:
+            return job_id
+        kind, data, kwargs = job["args"]
+        return self.submit(kind, data, **kwargs)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job["future"].done()]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
+            self._progress.pop(job_id, None)
+            self._messages.pop(job_id, None)
+            self._cancelled.pop(job_id, None)
+            self._spans.pop(job_id, None)
+
+    def cancel(self, job_id):
+        """Drop a queued job, or ask a running one to stop.
+
+        LSTM jobs stop after the current batch; a running Prophet fit finishes,
+        but its model is discarded rather than stored.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return
+        self._cancelled[job_id] = True
+        job["future"].cancel()
+
+    def take_spans(self, job_id):
+        """Tracing spans a finished job recorded in its worker; each job hands them out once."""
+        return self._spans.pop(job_id, [])
+
+    def status(self, job_id):
+        """Snapshot of a job: state ("queued", "running", "done", "failed", "cancelled", "unknown"),
+        progress, messages and the result or error once finished."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return {"state": "unknown"}
+        future = job["future"]
+        status = {
+            "kind": job["kind"],
+            "state": "running" if future.running() else "queued",
+            "progress": self._progress.get(job_id, 0.0),
+            "messages": list(self._messages.get(job_id, [])),
+        }
+        if future.done():
+            try:
+                status["result"] = future.result()
+                status["state"] = "done"
+            except (CancelledError, JobCancelled):
+                status["state"] = "cancelled"
+            except Exception as e:
+                status["state"] = "failed"
+                status["error"] = e
+        return status
+
+
+_job_manager = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager()
+        return _job_manager
+
+
+def _show_finished(job_id, status, render):
+    tracing.adopt(get_job_manager().take_spans(job_id))
+    for message in status.get("messages", []):
+        st.info(message)
+    state = status["state"]
+    if state == "done":
+        render(status["result"])
+    elif state == "failed":
+        st.error(f"Forecast failed: {status['error']}")
+    elif state == "cancelled":
+        st.warning("Forecast cancelled.")
+        if st.button("Run again", key=f"restart-{job_id}"):
+            get_job_manager().restart(job_id)
+            st.rerun()
+    else:
+        st.warning("This forecast is no longer available. Please run it again.")
+
+
+def show_job(job_id, render, poll_interval=1):
+    """Show a job's progress from a polling fragment, then call `render(result)` once it is done.
+
+    Only the fragment reruns while the job is queued or running, so the rest of
+    the page stays responsive.
+    """
+    manager = get_job_manager()
+    status = manager.status(job_id)
+    if status["state"] not in ("queued", "running"):
+        _show_finished(job_id, status, render)
+        return
+
+    @st.fragment(run_every=poll_interval)
+    def job_panel():
+        status = manager.status(job_id)
+        if status["state"] not in ("queued", "running"):
+            # A full rerun renders the result outside of the polling fragment
+            st.rerun()
+        for message in status["messages"]:
+            st.info(message)
+        text = "Queued..." if status["state"] == "queued" else "Training..."
+        st.progress(status["progress"], text=text)
+        if status["kind"] == "prophet" and status["state"] == "running":
+            st.caption("A running Prophet fit can't be stopped partway: Cancel waits for it to finish "
+                       "and then discards the model.")
+        if st.button("Cancel", key=f"cancel-{job_id}"):
+            manager.cancel(job_id)
+
+    job_panel()
@@ -0,0 +1,253 @@
+# Reuse of LLM agents and answers for unchanged data
+#
+# Dataframe agents are kept per (model, data fingerprint), so a rerun with the
+# same ticker, interval and rows reuses the agent instead of rebuilding it.
+# Answers are memoized by model, data fingerprint, the instructions around the
+# question and the normalized question, in memory and on disk under
+# LLM_CACHE_DIR. With LLM_CACHE_SIMILARITY set (e.g. 0.85) a question whose
+# word set is that similar to a cached one for the same data is answered from
+# the cache too. LLM_BACKEND=fake swaps Groq for a local fake chat model.
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from backends import load
+from model_registry import data_fingerprint
+
+LLM_CACHE_DIR = os.environ.get("LLM_CACHE_DIR", os.path.join("data", "llm_cache"))
+LLM_BACKEND = os.environ.get("LLM_BACKEND", "groq")
+
+FAKE_RESPONSE = "Thought: I can answer from the data.\nFinal Answer: Fake analysis (LLM_BACKEND=fake)."
+
+
+def chat_model(groq_api_key, model_name, **kwargs):
+    """The app's chat model: ChatGroq, or a local fake with LLM_BACKEND=fake."""
+    if LLM_BACKEND == "fake":
+        fakes = load("langchain_core.language_models.fake_chat_models")
+        return fakes.FakeListChatModel(responses=[FAKE_RESPONSE])
+    return load("langchain_groq").ChatGroq(groq_api_key=groq_api_key, model_name=model_name, **kwargs)
+
+
+def normalize_prompt(prompt):
+    """Lowercase, single-spaced, without trailing punctuation."""
+    return re.sub(r"\s+", " ", prompt.lower()).strip().rstrip("?.! ")
+
+
+def _similarity(a, b):
+    # Jaccard similarity of the word sets; questions about other numbers (days,
+    # dates, levels) never match
+    a, b = set(a.split()), set(b.split())
+    if {word for word in a if re.search(r"\d", word)} != {word for word in b if re.search(r"\d", word)}:
+        return 0.0
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+def _hash(*parts):
+    return hashlib.sha1(json.dumps(parts).encode()).hexdigest()
+
+
+class AnswerCache:
+    """LLM answers in a TTL + LRU memory tier over one JSON file per answer on disk.
+
+    Files are grouped by (model, data fingerprint, context), so near-duplicate
+    lookups only read the answers about the same data. The least recently used
+    files are removed beyond `max_entries`.
+    """
+
+    def __init__(self, root=LLM_CACHE_DIR, ttl=24 * 3600, max_entries=2000, memory_entries=256,
+                 min_similarity=None):
+        self.root = root
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.min_similarity = min_similarity
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    def _scope(self, model, data_hash, context):
+        # Answers of the fake backend never mix with real ones
+        return os.path.join(self.root, _hash(LLM_BACKEND, model, data_hash, context)[:20])
+
+    def _path(self, scope, prompt):
+        return os.path.join(scope, _hash(prompt)[:20] + ".json")
+
+    def _fresh(self, entry):
+        return entry["created"] + self.ttl > time.time()
+
+    def _remember(self, path, entry):
+        with self._lock:
+            self._memory[path] = entry
+            self._memory.move_to_end(path)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _read(self, path):
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if self._fresh(entry) else None
+
+    @staticmethod
+    def _touch(path):
+        # Recency for eviction; another process may have evicted the file meanwhile
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+    def get(self, model, data_hash, prompt, context=""):
+        """The cached answer for this question about this data, or None."""
+        prompt = normalize_prompt(prompt)
+        scope = self._scope(model, data_hash, context)
+        path = self._path(scope, prompt)
+        with self._lock:
+            entry = self._memory.get(path)
+            if entry is not None and self._fresh(entry):
+                self._memory.move_to_end(path)
+                self.hits += 1
+                return entry["answer"]
+        entry = self._read(path)
+        if entry is not None:
+            self._touch(path)
+            self._remember(path, entry)
+            with self._lock:
+                self.disk_hits += 1
+            return entry["answer"]
+        if self.min_similarity:
+            entry = self._nearest(scope, prompt)
+            if entry is not None:
+                with self._lock:
+                    self.near_hits += 1
+                return entry["answer"]
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _nearest(self, scope, prompt):
+        if not os.path.isdir(scope):
+            return None
+        best, best_path, best_score = None, None, self.min_similarity
+        for name in os.listdir(scope):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(scope, name)
+            entry = self._read(path)
+            if entry is None:
+                continue
+            score = _similarity(prompt, entry["prompt"])
+            if score >= best_score:
+                best, best_path, best_score = entry, path, score
+        if best_path is not None:
+            # Only the answer served counts as used, not every one scanned
+            self._touch(best_path)
+        return best
+
+    def put(self, model, data_hash, prompt, answer, context=""):
+        prompt = normalize_prompt(prompt)
+        scope = self._scope(model, data_hash, context)
+        path = self._path(scope, prompt)
+        entry = {"model": model, "data_hash": data_hash, "prompt": prompt, "answer": answer, "created": time.time()}
+        self._remember(path, entry)
+        os.makedirs(scope, exist_ok=True)
+        # Write next to the target and swap in so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=scope, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        files = []
+        for dirpath, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith(".json"):
+                    path = os.path.join(dirpath, name)
+                    try:
+                        files.append((os.path.getmtime(path), path))
+                    except FileNotFoundError:
+                        pass
+        if len(files) <= self.max_entries:
+            return
+        files.sort()
+        for _, path in files[:len(files) - self.max_entries]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            with self._lock:
+                self._memory.pop(path, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.near_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+                "hit_rate": (lookups - self.misses) / lookups if lookups else 0.0,
+            }
+
+
+class AgentCache:
+    """Built agents by (model, data fingerprint), least recently used dropped beyond `max_entries`."""
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._agents = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, model, data, build):
+        """(agent, data fingerprint); `build()` is only called for data not seen before."""
+        data_hash = data_fingerprint(data)
+        key = (LLM_BACKEND, model, data_hash)
+        with self._lock:
+            agent = self._agents.get(key)
+            if agent is not None:
+                self._agents.move_to_end(key)
+                self.hits += 1
+                return agent, data_hash
+            self.misses += 1
+        agent = build()
+        with self._lock:
+            self._agents[key] = agent
+            self._agents.move_to_end(key)
+            while len(self._agents) > self.max_entries:
+                self._agents.popitem(last=False)
+        return agent, data_hash
+
+
+_answers = None
+_agents = None
+_caches_lock = threading.Lock()
+
+
+def get_answer_cache():
+    global _answers
+    with _caches_lock:
+        if _answers is None:
+            similarity = os.environ.get("LLM_CACHE_SIMILARITY")
+            _answers = AnswerCache(min_similarity=float(similarity) if similarity else None)
+        return _answers
+
+
+def get_agent_cache():
+    global _agents
+    with _caches_lock:
+        if _agents is None:
+            _agents = AgentCache()
+        return _agents
@@ -0,0 +1,339 @@
+# LSTM model construction and multi-step forecasting
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from backends import load
+from indicators import ATR, MACD, RSI, SMA, compute_indicators, sma
+from lstm_numpy import WEIGHTS_FILE, NumpyLSTM
+from lstm_tuning import tuned_params
+from model_registry import data_fingerprint, get_registry
+from tracing import span
+from windowing import sliding_windows, window_dataset
+
+# Hyperparameters of the app's LSTM; `horizon` is set per forecast mode
+DEFAULT_PARAMS = {
+    "window_size": 30,
+    "units": 120,
+    "dropout": 0.2,
+    "epochs": 10,
+    "batch_size": 32,
+}
+
+# Columns the multivariate model forecasts together, and the indicators it also sees
+TARGETS = ["Open", "High", "Low", "Close", "Volume"]
+INDICATOR_FEATURES = ["MA20", "RSI", "MACD", "MACD Signal", "ATR"]
+
+_rollouts = weakref.WeakKeyDictionary()
+
+
+def build_model(window_size, horizon=1, units=120, dropout=0.2, n_features=1, n_targets=1):
+    """Three stacked LSTM layers with a Dense head predicting `horizon` steps of `n_targets` values at once.
+
+    Outputs are ordered bar by bar: all targets of the first step, then the next.
+    """
+    keras = load("tensorflow").keras
+    Input, LSTM, Dropout, Dense = (keras.layers.Input, keras.layers.LSTM, keras.layers.Dropout,
+                                   keras.layers.Dense)
+    model = keras.models.Sequential()
+    model.add(Input(shape=(window_size, n_features)))
+    model.add(LSTM(units=units, return_sequences=True))
+    model.add(Dropout(dropout))
+    model.add(LSTM(units=units, return_sequences=True))
+    model.add(Dropout(dropout))
+    model.add(LSTM(units=units))
+    model.add(Dropout(dropout))
+    model.add(Dense(units=horizon * n_targets))
+    model.compile(optimizer="adam", loss="mean_squared_error")
+    return model
+
+
+def fine_tune(model, scaler, values, n_new, params, epochs=2, drift_tolerance=0.1, callbacks=(), targets=None):
+    """Continue training a copy of `model` on the windows whose targets reach the last `n_new` values.
+
+    Returns None when the new values leave the scaler's fitted range by more than
+    `drift_tolerance` of that range; the caller should then refit from scratch.
+    With `targets`, `values` is (bars, features) as for train_model().
+    """
+    values = np.asarray(values, dtype="float64").reshape(len(values), -1)
+    low, high = scaler.data_min_, scaler.data_max_
+    margin = drift_tolerance * (high - low)
+    new_values = values[-n_new:]
+    if (new_values.min(axis=0) < low - margin).any() or (new_values.max(axis=0) > high + margin).any():
+        return None
+    window_size, horizon = params["window_size"], params["horizon"]
+    scaled = scaler.transform(values[-(n_new + window_size + horizon - 1):])
+    if targets is None:
+        scaled = scaled.ravel()
+    # Train a copy so the previous version stays intact in the registry
+    tf = load("tensorflow")
+    updated = tf.keras.models.clone_model(model)
+    updated.set_weights(model.get_weights())
+    updated.compile(optimizer="adam", loss="mean_squared_error")
+    dataset = window_dataset(scaled, window_size, batch_size=params["batch_size"],
+                             target=0 if targets is None else list(targets), horizon=horizon)
+    with span("lstm.fine_tune", rows=n_new, epochs=epochs):
+        updated.fit(dataset, epochs=epochs, callbacks=list(callbacks), verbose=0)
+    return updated
+
+
+def prepare_series(data, column):
+    """The forecast column as float64, without the warm-up rows of the 20-bar moving average or incomplete rows."""
+    ma20 = sma(data[column].to_numpy(dtype=np.float64), 20)
+    return data.loc[data.notna().all(axis=1).to_numpy() & ~np.isnan(ma20), column].astype(np.float64)
+
+
+def prepare_frame(data):
+    """OHLCV and indicator features as float64, without incomplete rows or the indicators' warm-up rows."""
+    features = pd.concat(
+        [data[TARGETS].astype(np.float64), compute_indicators(data)[INDICATOR_FEATURES]], axis=1
+    )
+    return features[features.notna().all(axis=1).to_numpy()]
+
+
+def train_model(scaled, params, callbacks=(), targets=None):
+    """Fit a fresh LSTM on the scaled series.
+
+    With `targets`, `scaled` is (bars, features) and the model predicts those feature columns.
+    """
+    window_size, horizon = params["window_size"], params["horizon"]
+    batch_size = params["batch_size"]
+    n_features = 1 if np.ndim(scaled) == 1 else scaled.shape[1]
+    target = 0 if targets is None else list(targets)
+    # Windows are strided views over the scaled series; training batches are
+    # materialized one at a time by the tf.data pipeline
+    with span("lstm.windows", rows=len(scaled), window_size=window_size):
+        X, _ = sliding_windows(scaled, window_size, horizon=horizon)
+        split = int(len(X) * 0.8)
+        train_ds = window_dataset(scaled, window_size, batch_size=batch_size, target=target, end=split,
+                                  horizon=horizon)
+        val_ds = window_dataset(scaled, window_size, batch_size=batch_size, target=target, start=split,
+                                horizon=horizon)
+    model = build_model(window_size, horizon=horizon, units=params["units"], dropout=params["dropout"],
+                        n_features=n_features, n_targets=1 if targets is None else len(targets))
+    with span("lstm.fit", rows=len(scaled), epochs=params["epochs"], horizon=horizon):
+        model.fit(train_ds, epochs=params["epochs"], validation_data=val_ds, callbacks=list(callbacks),
+                  verbose=0)
+    return model
+
+
+def update_model(registry, meta, series, params, notify=print, max_new_fraction=0.2, callbacks=(), targets=None):
+    """Fine-tune the latest stored model of this series (or feature frame) on the bars appended since it was trained.
+
+    Returns new artifacts, or None when a full refit is needed: no previous model,
+    rewritten history, too many new bars or scaler drift.
+    """
+    previous = registry.latest(meta)
+    if previous is None:
+        return None
+    previous_meta, artifacts = previous
+    # The previous fit's last bar is re-fetched and may have changed since (it
+    # was still forming), so it counts as new data and only the bars before it
+    # must match
+    n_old = previous_meta["n_rows"] - 1
+    n_new = len(series) - n_old
+    if n_new <= 0 or n_new > len(series) * max_new_fraction:
+        return None
+    if data_fingerprint(series.iloc[:n_old]) != previous_meta.get("prefix_hash"):
+        return None
+    model = fine_tune(artifacts["model"], artifacts["scaler"], series.values, n_new, params, callbacks=callbacks,
+                      targets=targets)
+    if model is None:
+        return None
+    notify(f"Updated the previous model with {n_new} new bars.")
+    return {"model": model, "scaler": artifacts["scaler"]}
+
+
+def forecast(series, periods, mode="recursive", ticker=None, interval=None, column=None,
+             params=None, callbacks=(), notify=print):
+    """Train, update or reuse an LSTM for `series` and forecast `periods` steps in price units.
+
+    mode "recursive" feeds each prediction back in (one compiled rollout),
+    mode "direct" trains a head that predicts all `periods` steps at once.
+    Models are only stored in the registry when `ticker` is given, and use the
+    settings stored by lstm_tuning for the series when there are any.
+    """
+    params = dict(params or tuned_params(ticker, interval, column) or DEFAULT_PARAMS,
+                  horizon=periods if mode == "direct" else 1)
+    window_size = params["window_size"]
+    values = series.values.reshape(-1, 1)
+    # Reuse a model trained on exactly this data and configuration if we have one,
+    # otherwise try to bring the latest one up to date with the new bars
+    registry = get_registry()
+    cached = None
+    if ticker is not None:
+        key, meta = registry.key("lstm", ticker, interval, column, params, series)
+        cached = registry.get(key)
+        if cached is not None:
+            notify("Using a previously trained model for this data.")
+        else:
+            cached = update_model(registry, meta, series, params, notify=notify, callbacks=callbacks)
+            if cached is not None:
+                registry.put(key, meta, cached)
+    if cached is not None:
+        model, scaler = cached["model"], cached["scaler"]
+        with span("lstm.scale", rows=len(values)):
+            scaled = scaler.transform(values).ravel()
+    else:
+        scaler = load("sklearn").MinMaxScaler()
+        with span("lstm.scale", rows=len(values)):
+            scaled = scaler.fit_transform(values).ravel()
+        model = train_model(scaled, params, callbacks=callbacks)
+        if ticker is not None:
+            registry.put(key, meta, {"model": model, "scaler": scaler})
+    # Future Predictions, starting from the most recent window
+    last_window = scaled[-window_size:]
+    with span("lstm.predict", periods=periods, mode=mode):
+        if mode == "direct":
+            future_preds = direct_forecast(model, last_window, periods)
+        else:
+            future_preds = recursive_forecast(model, last_window, periods)
+    return scaler.inverse_transform(np.asarray(future_preds).reshape(-1, 1)).ravel()
+
+
+def serve_forecast(series, periods, mode="recursive", ticker=None, interval=None, column=None, params=None):
+    """Forecast with the NumPy engine from a stored model trained on exactly this data, without TensorFlow.
+
+    Returns None when no such model has been exported; use forecast() then.
+    """
+    if ticker is None:
+        return None
+    params = dict(params or tuned_params(ticker, interval, column) or DEFAULT_PARAMS,
+                  horizon=periods if mode == "direct" else 1)
+    registry = get_registry()
+    key, _ = registry.key("lstm", ticker, interval, column, params, series)
+    path = registry.file(key, WEIGHTS_FILE)
+    if path is None:
+        return None
+    with span("lstm.serve", rows=len(series), periods=periods, mode=mode):
+        return NumpyLSTM.load(path).forecast(series.values, periods, mode=mode)
+
+
+class _IndicatorState:
+    """The indicator features of prepare_frame(), streamed on from the end of the history."""
+
+    def __init__(self, data):
+        high, low, close = (data[name].to_numpy(dtype=np.float64) for name in ("High", "Low", "Close"))
+        self.ma20, self.rsi, self.macd, self.atr = SMA(20), RSI(14), MACD(12, 26, 9), ATR(14)
+        self.ma20.extend(close)
+        self.rsi.extend(close)
+        self.macd.extend(close)
+        self.atr.extend(high, low, close)
+
+    def update(self, high, low, close):
+        line, signal = self.macd.update(close)
+        return [self.ma20.update(close), self.rsi.update(close), line, signal, self.atr.update(high, low, close)]
+
+
+def _consistent(bars):
+    """Widen High/Low to cover Open and Close and keep Volume non-negative, for (bars, TARGETS) arrays."""
+    open_, high, low, close, volume = bars.T
+    return np.column_stack([
+        open_,
+        np.maximum(high, np.maximum(open_, close)),
+        np.minimum(low, np.minimum(open_, close)),
+        close,
+        np.maximum(volume, 0.0),
+    ])
+
+
+def forecast_multivariate(data, periods, mode="recursive", ticker=None, interval=None, params=None,
+                          callbacks=(), notify=print):
+    """Forecast all TARGETS columns `periods` bars ahead with one model on OHLCV and indicator features.
+
+    Returns a frame with one row per future bar. In "recursive" mode each
+    predicted bar is fed back in, with its indicators updated incrementally; in
+    "direct" mode one forward pass predicts every bar. Bars are made consistent:
+    High and Low always cover Open and Close. Stored models are reused or
+    fine-tuned on new bars like forecast(); there are no tuned settings for the
+    joint model, so it uses DEFAULT_PARAMS unless `params` is given.
+    """
+    params = dict(params or DEFAULT_PARAMS, horizon=periods if mode == "direct" else 1)
+    window_size = params["window_size"]
+    n_targets = len(TARGETS)
+    features = prepare_frame(data)
+    registry = get_registry()
+    cached = None
+    if ticker is not None:
+        key, meta = registry.key("lstm", ticker, interval, "multivariate", params, features)
+        cached = registry.get(key)
+        if cached is not None:
+            notify("Using a previously trained model for this data.")
+        else:
+            cached = update_model(registry, meta, features, params, notify=notify, callbacks=callbacks,
+                                  targets=range(n_targets))
+            if cached is not None:
+                registry.put(key, meta, cached)
+    if cached is not None:
+        model, scaler = cached["model"], cached["scaler"]
+        scaled = scaler.transform(features.to_numpy())
+    else:
+        scaler = load("sklearn").MinMaxScaler()
+        with span("lstm.scale", rows=len(features), features=features.shape[1]):
+            scaled = scaler.fit_transform(features.to_numpy())
+        model = train_model(scaled, params, callbacks=callbacks, targets=range(n_targets))
+        if ticker is not None:
+            registry.put(key, meta, {"model": model, "scaler": scaler})
+
+    def unscale(values):
+        return (values - scaler.min_[:n_targets]) / scaler.scale_[:n_targets]
+
+    window = scaled[-window_size:].astype("float32")
+    with span("lstm.predict", periods=periods, mode=mode, features=features.shape[1]):
+        if mode == "direct":
+            out = model(window[None], training=False).numpy()[0].reshape(-1, n_targets)[:periods]
+            bars = _consistent(unscale(out.astype(np.float64)))
+        else:
+            indicators = _IndicatorState(data)
+            bars = []
+            for _ in range(periods):
+                out = model(window[None], training=False).numpy()[0, :n_targets]
+                bar = _consistent(unscale(out.astype(np.float64))[None])[0]
+                row = np.concatenate([bar, indicators.update(bar[1], bar[2], bar[3])])
+                window = np.vstack([window[1:], scaler.transform(row[None]).astype("float32")])
+                bars.append(bar)
+            bars = np.array(bars)
+    return pd.DataFrame(bars, columns=TARGETS)
+
+
+def _make_rollout(model):
+    tf = load("tensorflow")
+
+    @tf.function
+    def rollout(window, periods):
+        preds = tf.TensorArray(tf.float32, size=periods)
+
+        def step(i, window, preds):
+            next_pred = model(window, training=False)[:, :1]
+            preds = preds.write(i, next_pred[0, 0])
+            # Drop the oldest bar and append the prediction as the newest one
+            window = tf.concat([window[:, 1:, :], tf.reshape(next_pred, (1, 1, 1))], axis=1)
+            return i + 1, window, preds
+
+        _, _, preds = tf.while_loop(lambda i, *_: i < periods, step, (tf.constant(0), window, preds))
+        return preds.stack()
+
+    return rollout
+
+
+def recursive_forecast(model, window, periods):
+    """Feed each prediction back as input, with the whole rollout in one compiled graph call.
+
+    Uses the first output of the model, so it works for single-step and direct models.
+    """
+    tf = load("tensorflow")
+    rollout = _rollouts.get(model)
+    if rollout is None:
+        rollout = _rollouts[model] = _make_rollout(model)
+    window = tf.constant(np.asarray(window, dtype="float32").reshape(1, -1, 1))
+    return rollout(window, tf.constant(periods, dtype=tf.int32)).numpy()
+
+
+def direct_forecast(model, window, periods):
+    """All horizons from a single forward pass of a model built with horizon >= periods."""
+    horizon = model.output_shape[-1]
+    if horizon < periods:
+        raise ValueError(f"Model predicts {horizon} steps, {periods} were requested")
+    window = np.asarray(window, dtype="float32").reshape(1, -1, 1)
+    return model(window, training=False).numpy()[0, :periods]
@@ -0,0 +1,182 @@
+# TensorFlow-free inference for the app's LSTM forecasters
+#
+# export() writes the weights of a model from lstm_forecast.build_model() and
+# its MinMaxScaler to a compressed .npz file; NumpyLSTM replays the forward pass
+# of the stacked LSTM layers and the Dense head with NumPy, in float32 like
+# Keras. Dropout is the identity at inference time, so it is simply left out.
+import os
+
+import numpy as np
+
+WEIGHTS_FILE = "weights.npz"
+
+
+def _sigmoid(x):
+    return 0.5 * (np.tanh(0.5 * x) + 1.0)
+
+
+def _lstm(x, kernel, recurrent_kernel, bias, return_sequences):
+    """One Keras LSTM layer (gates i, f, c, o) for every model at once.
+
+    x is (models, batch, steps, features); the weights have a leading models axis.
+    """
+    models, batch, steps, features = x.shape
+    units = recurrent_kernel.shape[-1] // 4
+    # Input contributions of every time step in one matmul per model
+    inputs = np.matmul(x.reshape(models, batch * steps, features), kernel) + bias[:, None, :]
+    inputs = inputs.reshape(models, batch, steps, 4 * units)
+    h = np.zeros((models, batch, units), dtype=np.float32)
+    c = np.zeros_like(h)
+    outputs = []
+    for t in range(steps):
+        z = inputs[:, :, t] + np.matmul(h, recurrent_kernel)
+        i = _sigmoid(z[..., :units])
+        f = _sigmoid(z[..., units:2 * units])
+        g = np.tanh(z[..., 2 * units:3 * units])
+        o = _sigmoid(z[..., 3 * units:])
+        c = f * c + i * g
+        h = o * np.tanh(c)
+        if return_sequences:
+            outputs.append(h)
+    return np.stack(outputs, axis=2) if return_sequences else h
+
+
+class NumpyLSTM:
+    """Forward pass of stacked LSTM layers and a Dense head, plus the fitted min-max scaling.
+
+    Every weight array has a leading axis over models. An engine loaded from one
+    export holds a single model; stack() combines same-shaped models, e.g. one
+    per ticker, so their windows run through the same matmuls in one call.
+    """
+
+    def __init__(self, layers, dense_kernel, dense_bias, scaler_min, scaler_scale, window_size):
+        self.layers = layers
+        self.dense_kernel = dense_kernel
+        self.dense_bias = dense_bias
+        self.scaler_min = scaler_min
+        self.scaler_scale = scaler_scale
+        self.window_size = window_size
+
+    def __len__(self):
+        return len(self.dense_kernel)
+
+    @property
+    def horizon(self):
+        return self.dense_kernel.shape[-1]
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as weights:
+            layers = [
+                tuple(weights[f"lstm_{i}_{name}"][None] for name in ("kernel", "recurrent_kernel", "bias"))
+                for i in range(int(weights["n_layers"]))
+            ]
+            return cls(layers, weights["dense_kernel"][None], weights["dense_bias"][None],
+                       weights["scaler_min"][None], weights["scaler_scale"][None], int(weights["window_size"]))
+
+    @classmethod
+    def stack(cls, engines):
+        """One engine running all models of `engines`, in order, in a single forward pass."""
+        if len({engine.window_size for engine in engines}) > 1:
+            raise ValueError("Stacked models must share the window size")
+        layers = [
+            tuple(np.concatenate(arrays) for arrays in zip(*same_layer))
+            for same_layer in zip(*(engine.layers for engine in engines))
+        ]
+        return cls(
+            layers,
+            *(np.concatenate([getattr(engine, name) for engine in engines])
+              for name in ("dense_kernel", "dense_bias", "scaler_min", "scaler_scale")),
+            engines[0].window_size,
+        )
+
+    def predict(self, windows):
+        """Scaled windows of shape (batch, window_size, features) to (batch, horizon).
+
+        A stacked engine takes (models, batch, window_size, features) and returns
+        (models, batch, horizon).
+        """
+        x = np.asarray(windows, dtype=np.float32)
+        single = x.ndim == 3
+        if single:
+            x = x[None]
+        for n, (kernel, recurrent_kernel, bias) in enumerate(self.layers):
+            x = _lstm(x, kernel, recurrent_kernel, bias, return_sequences=n < len(self.layers) - 1)
+        out = np.matmul(x, self.dense_kernel) + self.dense_bias[:, None, :]
+        return out[0] if single else out
+
+    def rollout(self, windows, periods):
+        """Recursive forecast of (models, batch, window_size, 1) windows: each prediction is appended
+        to the window for the next step. Returns (models, batch, periods)."""
+        windows = np.array(windows, dtype=np.float32)
+        preds = []
+        for _ in range(periods):
+            next_pred = self.predict(windows)[..., :1]
+            preds.append(next_pred[..., 0])
+            windows = np.concatenate([windows[:, :, 1:], next_pred[..., None]], axis=2)
+        return np.stack(preds, axis=-1)
+
+    def forecast(self, values, periods, mode="recursive"):
+        """`periods` future values in price units following an unscaled series.
+
+        A stacked engine takes one series per model, as a 2-D array or a list of
+        series at least a window long, and returns one row of predictions per model.
+        """
+        single = np.ndim(values[0]) == 0
+        series = [values] if single else values
+        if len(series) != len(self):
+            raise ValueError(f"Expected {len(self)} series, got {len(series)}")
+        last = np.stack([np.asarray(s, dtype=np.float64)[-self.window_size:] for s in series])
+        # Single-feature models: scale with the target column's min/max
+        scaled = last * self.scaler_scale[:, :1] + self.scaler_min[:, :1]
+        windows = scaled[:, None, :, None]
+        if mode == "direct":
+            if self.horizon < periods:
+                raise ValueError(f"Model predicts {self.horizon} steps, {periods} were requested")
+            preds = self.predict(windows)[:, 0, :periods]
+        else:
+            preds = self.rollout(windows, periods)[:, 0]
+        preds = (preds.astype(np.float64) - self.scaler_min[:, :1]) / self.scaler_scale[:, :1]
+        return preds[0] if single else preds
+
+
+def export(model, scaler, path, check=True, atol=1e-4):
+    """Write the weights of a build_model() model and its fitted MinMaxScaler to `path` (.npz).
+
+    With `check`, the NumPy forward pass is compared with model.predict on random
+    windows and a ValueError is raised if they differ by more than `atol`.
+    """
+    weights = {}
+    n_layers = 0
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind == "LSTM":
+            config = layer.get_config()
+            if config["activation"] != "tanh" or config["recurrent_activation"] != "sigmoid":
+                raise ValueError(f"Unsupported LSTM activations in layer {layer.name}")
+            kernel, recurrent_kernel, bias = layer.get_weights()
+            weights[f"lstm_{n_layers}_kernel"] = kernel
+            weights[f"lstm_{n_layers}_recurrent_kernel"] = recurrent_kernel
+            weights[f"lstm_{n_layers}_bias"] = bias
+            n_layers += 1
+        elif kind == "Dense":
+            weights["dense_kernel"], weights["dense_bias"] = layer.get_weights()
+        elif kind != "Dropout":
+            raise ValueError(f"Unsupported layer {layer.name} ({kind})")
+    window_size = model.input_shape[1]
+    weights = {name: np.asarray(value, dtype=np.float32) for name, value in weights.items()}
+    np.savez_compressed(
+        path,
+        n_layers=n_layers,
+        window_size=window_size,
+        scaler_min=np.asarray(scaler.min_, dtype=np.float64),
+        scaler_scale=np.asarray(scaler.scale_, dtype=np.float64),
+        **weights,
+    )
+    if check:
+        windows = np.random.default_rng(0).random((8, window_size, model.input_shape[2])).astype(np.float32)
+        error = np.abs(NumpyLSTM.load(path).predict(windows) - model.predict(windows, verbose=0)).max()
+        if error > atol:
+            os.remove(path)
+            raise ValueError(f"NumPy forward pass differs from model.predict by {error:.2e}")
+    return path
@@ -0,0 +1,163 @@
+# Hyperparameter search for the LSTM forecaster, with tuned settings kept per series
+#
+#   python -m lstm_tuning AAPL [--interval 1d] [--column Close] [--trials 27] [--eta 3]
+#                              [--min-epochs 2] [--max-epochs 30] [--workers 4]
+#
+# Successive halving: `trials` random configurations are trained for a small
+# epoch budget in parallel worker processes; the best 1/eta by validation loss
+# go on to a budget eta times larger, until one is left or the budget reaches
+# max_epochs. Every trial also stops early once its validation loss stalls.
+# The winner is stored for the (ticker, interval, column) and lstm_forecast
+# uses it instead of DEFAULT_PARAMS from then on.
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+TUNED_PARAMS_PATH = os.environ.get("TUNED_PARAMS_PATH", os.path.join("data", "tuned_params.json"))
+
+SEARCH_SPACE = {
+    "window_size": [20, 30, 45, 60],
+    "units": [32, 64, 120, 160],
+    "dropout": [0.0, 0.1, 0.2, 0.3],
+    "batch_size": [32, 64, 128],
+}
+
+_lock = threading.Lock()
+
+
+def _series_key(ticker, interval, column):
+    return f"{ticker}|{interval}|{column}"
+
+
+def _load(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def tuned_params(ticker, interval, column, path=TUNED_PARAMS_PATH):
+    """The stored winning LSTM hyperparameters for this series, or None."""
+    if ticker is None:
+        return None
+    entry = _load(path).get(_series_key(ticker, interval, column))
+    return entry and entry["params"]
+
+
+def save_tuned_params(ticker, interval, column, params, val_loss, path=TUNED_PARAMS_PATH):
+    with _lock:
+        tuned = _load(path)
+        tuned[_series_key(ticker, interval, column)] = {"params": params, "val_loss": val_loss, "tuned_at": time.time()}
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(tuned, f, indent=2)
+        os.replace(tmp_path, path)
+
+
+def sample_configs(n, space=SEARCH_SPACE, seed=0):
+    """`n` distinct random configurations from `space` (fewer if the space is smaller)."""
+    rng = np.random.default_rng(seed)
+    total = math.prod(len(values) for values in space.values())
+    configs, seen = [], set()
+    while len(configs) < min(n, total):
+        config = {name: values[rng.integers(len(values))] for name, values in space.items()}
+        key = tuple(config.values())
+        if key not in seen:
+            seen.add(key)
+            configs.append({name: value.item() if hasattr(value, "item") else value
+                            for name, value in config.items()})
+    return configs
+
+
+def _trial(scaled, config, epochs, split, patience):
+    # Runs inside a worker process
+    from backends import load
+    from lstm_forecast import build_model
+    from windowing import window_dataset
+
+    keras = load("tensorflow").keras
+    window_size, batch_size = config["window_size"], config["batch_size"]
+    # Validation targets are the same bars for every window size: those from `split` on
+    train_ds = window_dataset(scaled, window_size, batch_size=batch_size, end=split - window_size)
+    val_ds = window_dataset(scaled, window_size, batch_size=batch_size, start=split - window_size)
+    model = build_model(window_size, units=config["units"], dropout=config["dropout"])
+    stop = keras.callbacks.EarlyStopping(monitor="val_loss", patience=patience, restore_best_weights=True)
+    history = model.fit(train_ds, epochs=epochs, validation_data=val_ds, callbacks=[stop], verbose=0)
+    losses = history.history["val_loss"]
+    best = int(np.argmin(losses))
+    return {"val_loss": float(losses[best]), "best_epoch": best + 1}
+
+
+def search(series, trials=27, eta=3, min_epochs=2, max_epochs=30, patience=3, workers=None, seed=0,
+           space=SEARCH_SPACE, notify=print):
+    """Successive-halving search over `space` on a price series; returns (params, val_loss, results).
+
+    The returned params are DEFAULT_PARAMS updated with the winning configuration
+    and the epoch count at which it reached its best validation loss.
+    """
+    from backends import load
+    from lstm_forecast import DEFAULT_PARAMS
+
+    values = np.asarray(series, dtype=np.float64).reshape(-1, 1)
+    scaled = load("sklearn").MinMaxScaler().fit_transform(values).ravel()
+    split = int(len(scaled) * 0.8)
+    if split <= max(space["window_size"]):
+        raise ValueError(f"Not enough bars to tune: {len(scaled)}")
+    configs = sample_configs(trials, space, seed)
+    epochs = min_epochs
+    results = []
+    workers = workers or max(1, (os.cpu_count() or 2) // 2)
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(workers, mp_context=context) as executor:
+        while True:
+            futures = [executor.submit(_trial, scaled, config, epochs, split, patience) for config in configs]
+            scored = [dict(config, epochs=epochs, **future.result()) for config, future in zip(configs, futures)]
+            results.extend(scored)
+            scored.sort(key=lambda result: result["val_loss"])
+            notify(f"{len(configs)} trials at {epochs} epochs, best val_loss {scored[0]['val_loss']:.5f}")
+            if len(scored) == 1 or epochs >= max_epochs:
+                break
+            # Prune: only the best 1/eta go on, with eta times the epoch budget
+            configs = [{name: result[name] for name in space} for result in scored[:max(1, len(scored) // eta)]]
+            epochs = min(max_epochs, epochs * eta)
+    winner = scored[0]
+    params = dict(DEFAULT_PARAMS, **{name: winner[name] for name in space}, epochs=winner["best_epoch"])
+    return params, winner["val_loss"], results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the LSTM forecaster for one ticker and interval")
+    parser.add_argument("ticker")
+    parser.add_argument("--interval", default="1d")
+    parser.add_argument("--column", default="Close")
+    parser.add_argument("--trials", type=int, default=27)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--min-epochs", type=int, default=2)
+    parser.add_argument("--max-epochs", type=int, default=30)
+    parser.add_argument("--patience", type=int, default=3)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    from bar_store import get_bars
+    from lstm_forecast import prepare_series
+
+    series = prepare_series(get_bars(args.ticker, args.interval).reset_index(), args.column)
+    params, val_loss, _ = search(series.values, args.trials, args.eta, args.min_epochs, args.max_epochs,
+                                 args.patience, args.workers, args.seed)
+    save_tuned_params(args.ticker, args.interval, args.column, params, val_loss)
+    print(f"Stored for {args.ticker} {args.interval} {args.column}: {params} (val_loss {val_loss:.5f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# Process-wide market data cache shared by every page and session
+import threading
+
+import numpy as np
+import pandas as pd
+
+from bar_store import BarStore
+from single_flight import SingleFlightCache
+from tracing import span
+
+# How long a cached frame is considered fresh, in seconds, per bar interval
+INTERVAL_TTL = {
+    "1m": 30,
+    "5m": 60,
+    "30m": 300,
+    "60m": 600,
+    "1d": 3600,
+}
+DEFAULT_TTL = 6 * 3600
+
+
+def compact(data):
+    """The bars as a flat frame over read-only columns: float32 prices and int64 volume.
+
+    The index stays a DatetimeIndex, which is an int64 epoch array underneath.
+    float32 keeps about 7 significant digits: a cent up to roughly $100,000, but
+    coarser above that (0.0625 for BRK-A, wider than its $0.01 tick). That is
+    fine for charts and indicators; prepare_series() and prepare_history() hand
+    the models float64 columns. Volume with gaps stays float64, since float32 is
+    only exact for integers up to about 16M. Shared data can't be edited in
+    place, so pages derive new frames from it rather than modifying it.
+    """
+    columns = {}
+    for name in data.columns:
+        values = data[name].to_numpy()
+        if name == "Volume":
+            values = values.astype(np.float64 if pd.isna(values).any() else np.int64)
+        elif values.dtype.kind == "f":
+            values = values.astype(np.float32)
+        else:
+            values = values.copy()
+        values.flags.writeable = False
+        columns[name] = values
+    return pd.DataFrame(columns, index=data.index, copy=False)
+
+
+class MarketDataService:
+    """TTL + LRU cache in front of the bar store with single-flight fetching.
+
+    Concurrent requests for the same (ticker, interval) wait for one fetch
+    instead of each going to the network.
+    """
+
+    def __init__(self, store=None, max_entries=64, ttl=None):
+        self.store = store if store is not None else BarStore()
+        self.max_entries = max_entries
+        self.ttl = dict(INTERVAL_TTL if ttl is None else ttl)
+        self._cache = SingleFlightCache(max_entries)
+
+    def get(self, ticker, interval, period=None):
+        """Return a read-only frame of bars, optionally only the trailing `period` (e.g. "5d")."""
+        with span("market_data.get", ticker=ticker, interval=interval, period=period) as stage:
+            data = self._get_full(ticker, interval)
+            if period is not None and not data.empty:
+                data = data.loc[data.index[-1] - pd.Timedelta(period):]
+            stage.set(rows=len(data))
+        # A shallow copy over the same read-only arrays, so columns a page adds never reach the cache
+        return data.copy(deep=False)
+
+    def _get_full(self, ticker, interval):
+        return self._cache.get(
+            (ticker, interval),
+            lambda: compact(self.store.get(ticker, interval)),
+            self.ttl.get(interval, DEFAULT_TTL),
+        )
+
+    def invalidate(self, ticker=None, interval=None):
+        self._cache.invalidate(lambda key: ticker in (None, key[0]) and interval in (None, key[1]))
+
+    def stats(self):
+        stats = self._cache.stats()
+        stats["memory_mb"] = sum(data.memory_usage(index=True).sum() for data in self._cache.values()) / 2**20
+        return stats
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = MarketDataService()
+        return _service
+
+
+def get_bars(ticker, interval, period=None):
+    """Read bars through the shared market data service."""
+    return get_service().get(ticker, interval, period=period)
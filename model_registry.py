@@ -0,0 +1,231 @@
+# Local registry of trained LSTM and Prophet models
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+MODEL_REGISTRY_DIR = os.environ.get("MODEL_REGISTRY_DIR", os.path.join("data", "models"))
+
+
+def data_fingerprint(data):
+    """Stable hash of a Series/DataFrame's index and values."""
+    hashed = pd.util.hash_pandas_object(data, index=True).values
+    return hashlib.sha1(hashed.tobytes()).hexdigest()
+
+
+def _dir_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass  # removed by a concurrent evict()
+    return total
+
+
+def _save_lstm(path, artifacts):
+    from lstm_numpy import WEIGHTS_FILE, export
+
+    artifacts["model"].save(os.path.join(path, "model.keras"))
+    with open(os.path.join(path, "scaler.pkl"), "wb") as f:
+        pickle.dump(artifacts["scaler"], f)
+    # TensorFlow-free copy for serving; models the NumPy engine can't replay are served by Keras
+    try:
+        export(artifacts["model"], artifacts["scaler"], os.path.join(path, WEIGHTS_FILE))
+    except ValueError:
+        pass
+
+
+def _load_lstm(path):
+    from tensorflow.keras.models import load_model
+
+    with open(os.path.join(path, "scaler.pkl"), "rb") as f:
+        scaler = pickle.load(f)
+    return {"model": load_model(os.path.join(path, "model.keras")), "scaler": scaler}
+
+
+def _save_prophet(path, artifacts):
+    from prophet.serialize import model_to_json
+
+    with open(os.path.join(path, "model.json"), "w") as f:
+        f.write(model_to_json(artifacts["model"]))
+
+
+def _load_prophet(path):
+    from prophet.serialize import model_from_json
+
+    with open(os.path.join(path, "model.json")) as f:
+        return {"model": model_from_json(f.read())}
+
+
+SERIALIZERS = {
+    "lstm": (_save_lstm, _load_lstm),
+    "prophet": (_save_prophet, _load_prophet),
+}
+
+
+class ModelRegistry:
+    """Trained models on disk, one directory per version, plus a small in-memory tier.
+
+    A version is identified by the model kind, ticker, interval, column,
+    hyperparameters and a fingerprint of the training data. The least recently
+    used versions are removed once `max_entries` or `max_bytes` is exceeded.
+    """
+
+    def __init__(self, root=MODEL_REGISTRY_DIR, max_entries=50, max_bytes=1 << 30, memory_entries=8):
+        self.root = root
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, kind, ticker, interval, column, params, data):
+        meta = {
+            "kind": kind,
+            "ticker": ticker,
+            "interval": interval,
+            "column": column,
+            "params": params,
+            "data_hash": data_fingerprint(data),
+        }
+        key = hashlib.sha1(json.dumps(meta, sort_keys=True).encode()).hexdigest()
+        # Row count and the hash without the last bar let a later version tell which
+        # bars are new since this one; the last bar may still have been forming
+        meta["n_rows"] = len(data)
+        meta["prefix_hash"] = data_fingerprint(data.iloc[:-1])
+        return key, meta
+
+    def _path(self, key):
+        return os.path.join(self.root, key)
+
+    def _remember(self, key, artifacts):
+        with self._lock:
+            self._memory[key] = artifacts
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def _read_meta(self, key):
+        # Versions are read while other processes write and evict them; one that
+        # vanishes or can't be read is treated as absent
+        meta_path = os.path.join(self._path(key), "meta.json")
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            # Recency is the file's mtime, so using a version never rewrites meta.json
+            meta["last_used"] = os.path.getmtime(meta_path)
+        except (OSError, ValueError):
+            return None
+        return meta
+
+    def _touch(self, key):
+        try:
+            os.utime(os.path.join(self._path(key), "meta.json"))
+        except OSError:
+            pass
+
+    def get(self, key):
+        """Return the stored artifacts for `key`, or None if it was never trained or got evicted."""
+        path = self._path(key)
+        with self._lock:
+            artifacts = self._memory.get(key)
+            if artifacts is not None:
+                self._memory.move_to_end(key)
+        meta = self._read_meta(key)
+        if meta is None:
+            return None
+        self._touch(key)
+        if artifacts is None:
+            try:
+                artifacts = SERIALIZERS[meta["kind"]][1](path)
+            except (OSError, ValueError):
+                return None
+            self._remember(key, artifacts)
+        return artifacts
+
+    def file(self, key, name):
+        """Path of the stored file `name` of version `key` without loading it, or None."""
+        path = os.path.join(self._path(key), name)
+        if not os.path.exists(os.path.join(self._path(key), "meta.json")) or not os.path.exists(path):
+            return None
+        self._touch(key)
+        return path
+
+    def put(self, key, meta, artifacts):
+        """Store `artifacts` (model plus fitted preprocessing) under `key` and evict old versions."""
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(dir=self.root, prefix=".tmp-")
+        try:
+            SERIALIZERS[meta["kind"]][0](tmp_path, artifacts)
+            now = time.time()
+            with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+                json.dump(dict(meta, created=now, last_used=now), f)
+            shutil.rmtree(self._path(key), ignore_errors=True)
+            os.replace(tmp_path, self._path(key))
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        self._remember(key, artifacts)
+        self.evict(keep=key)
+
+    def versions(self):
+        """Metadata of every stored version, most recently used first."""
+        result = []
+        if not os.path.isdir(self.root):
+            return result
+        for key in os.listdir(self.root):
+            if key.startswith("."):
+                continue
+            meta = self._read_meta(key)
+            if meta is None:
+                continue
+            meta["key"] = key
+            meta["size"] = _dir_size(os.path.join(self.root, key))
+            result.append(meta)
+        return sorted(result, key=lambda meta: meta["last_used"], reverse=True)
+
+    def latest(self, meta):
+        """Most recently trained version of the same series and configuration, any training data.
+
+        Returns (meta, artifacts) or None; used to warm-start from a previous fit.
+        """
+        fields = ("kind", "ticker", "interval", "column", "params")
+        matches = [
+            version for version in self.versions()
+            if all(version[field] == meta[field] for field in fields)
+        ]
+        for version in sorted(matches, key=lambda version: version["created"], reverse=True):
+            artifacts = self.get(version["key"])
+            if artifacts is not None:
+                return version, artifacts
+        return None
+
+    def evict(self, keep=None):
+        versions = self.versions()
+        total = sum(meta["size"] for meta in versions)
+        while versions and (len(versions) > self.max_entries or total > self.max_bytes):
+            oldest = versions.pop()
+            if oldest["key"] == keep:
+                break
+            shutil.rmtree(self._path(oldest["key"]), ignore_errors=True)
+            with self._lock:
+                self._memory.pop(oldest["key"], None)
+            total -= oldest["size"]
+
+
+_registry = None
+
+
+def get_registry():
+    global _registry
+    if _registry is None:
+        _registry = ModelRegistry()
+    return _registry
@@ -0,0 +1,97 @@
+# Concurrent stages of the Stock Trend With News analysis
+#
+# The news lookup, the price bars and the Groq client don't depend on each
+# other, so start() runs them together on a shared thread pool and the page
+# shows each one as soon as it is ready. Only the agent needs all three. The
+# wait before the first result is then roughly the slowest stage, not the sum of
+# all of them. Stages run in a copy of the caller's context, so their spans
+# stay attached to the page's request.
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from backends import load
+from analytics import summarize
+from indicators import compute_indicators
+from llm_cache import chat_model
+from market_data import get_bars
+from news_client import get_news_client
+from tracing import span
+
+MODEL_NAME = "llama3-70b-8192"
+
+# Stage names in the order the page reports them
+STAGES = {
+    "news": "News articles",
+    "prices": "Price bars and analytics",
+    "llm": "LLM client",
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="news-analysis")
+        return _executor
+
+
+def load_prices(ticker, interval, rows=100):
+    """The last `rows` bars with indicators, and the analytics summary (None when it can't be computed)."""
+    data = get_bars(ticker, interval)
+    if data.empty:
+        raise ValueError("No stock data found. Please check the ticker or interval.")
+    data = data.reset_index()
+    try:
+        summary = summarize(data, interval)
+    except ValueError:
+        summary = None
+    return pd.concat([data, compute_indicators(data)], axis=1).tail(rows), summary
+
+
+def build_llm(groq_api_key, model_name=MODEL_NAME):
+    """A streaming chat model; the agent module is imported here too, off the page's thread."""
+    with span("llm.client", model=model_name):
+        load("langchain_agents")
+        return chat_model(groq_api_key, model_name, streaming=True)
+
+
+def start(company, ticker, interval, from_date, to_date, news_api_key, groq_api_key):
+    """Submit the independent stages at once; returns {stage: future}."""
+    executor = get_executor()
+    jobs = {
+        "news": (get_news_client(news_api_key).everything, company, from_date, to_date),
+        "prices": (load_prices, ticker, interval),
+        "llm": (build_llm, groq_api_key),
+    }
+    return {
+        name: executor.submit(contextvars.copy_context().run, *job)
+        for name, job in jobs.items()
+    }
+
+
+def token_callback(on_token, on_start=None):
+    """LangChain callback handler passing each streamed token to `on_token`.
+
+    `on_start` is called whenever the agent starts another LLM call.
+    """
+    BaseCallbackHandler = load("langchain_callbacks").BaseCallbackHandler
+
+    class TokenCallback(BaseCallbackHandler):
+        def on_llm_start(self, serialized, prompts, **kwargs):
+            if on_start is not None:
+                on_start()
+
+        def on_chat_model_start(self, serialized, messages, **kwargs):
+            if on_start is not None:
+                on_start()
+
+        def on_llm_new_token(self, token, **kwargs):
+            on_token(token)
+
+    return TokenCallback()
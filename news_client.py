@@ -0,0 +1,217 @@
+# Shared NewsAPI client: pooled connections, a TTL cache and a local article archive
+#
+# Every page asks the same client, so repeated lookups reuse one keep-alive
+# connection pool and, within the TTL, the same response. Articles are also
+# archived per query, indexed by URL. Once a query's archive covers the start of
+# a requested range, only articles published since the newest archived one are
+# downloaded and the rest are served from disk.
+#
+# NEWS_API_URL points the client at another server, e.g. the local stub of
+# benchmarks.news_client.
+import json
+import os
+import tempfile
+import threading
+from urllib.parse import quote
+
+from single_flight import SingleFlightCache
+from tracing import span
+
+NEWS_API_URL = os.environ.get("NEWS_API_URL", "https://newsapi.org/v2/everything")
+NEWS_ARCHIVE_DIR = os.environ.get("NEWS_ARCHIVE_DIR", os.path.join("data", "news"))
+
+
+class NewsAPIError(Exception):
+    def __init__(self, status, text):
+        super().__init__(f"{status} - {text}")
+        self.status = status
+
+
+def _make_session(pool_size):
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _day(value):
+    # Dates, datetimes and ISO strings all start with YYYY-MM-DD
+    return (value.isoformat() if hasattr(value, "isoformat") else str(value))[:10]
+
+
+def _extend_coverage(archive, since, to, articles, complete):
+    # The archive holds every article from covered_from up to its newest one. A
+    # download that stopped short only counts back to the oldest article received.
+    if complete:
+        received_from = since
+    elif articles:
+        received_from = min(article["publishedAt"] for article in articles)
+    else:
+        return
+    covered, latest = archive["covered_from"], archive["latest"]
+    if covered is None or to < covered[:10] or (latest is not None and received_from > latest):
+        # Not adjacent to what was covered: the archive only counts from this download on
+        archive["covered_from"] = received_from
+    else:
+        archive["covered_from"] = min(covered, received_from)
+
+
+class NewsClient:
+    """NewsAPI /everything lookups through a pooled session, a TTL + LRU cache and a per-query archive.
+
+    Concurrent lookups of the same (query, from, to) wait for one download.
+    Results have the NewsAPI response shape, articles newest first. A download
+    pages through the results up to `max_pages`; when it stops short, the
+    archive only counts as covering back to the oldest article received.
+    """
+
+    def __init__(self, api_key, url=NEWS_API_URL, archive_dir=NEWS_ARCHIVE_DIR, ttl=900, max_entries=128,
+                 language="en", session=None, pool_size=8, page_size=100, max_pages=5):
+        self.api_key = api_key
+        self.url = url
+        self.archive_dir = archive_dir
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.language = language
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.session = session if session is not None else _make_session(pool_size)
+        self._lock = threading.Lock()
+        self._archive_locks = {}
+        self._cache = SingleFlightCache(max_entries)
+        self.downloads = 0
+        self.downloaded_articles = 0
+        self.archived_articles = 0
+
+    def everything(self, query, from_date, to_date):
+        """Articles about `query` published between the two dates (inclusive days)."""
+        key = (query, _day(from_date), _day(to_date))
+        return self._cache.get(key, lambda: self._lookup(*key), self.ttl)
+
+    def _archive_lock(self, query):
+        # One lock per archive file, held for reading and writing it but never across a download
+        path = self.archive_path(query)
+        with self._lock:
+            lock = self._archive_locks.get(path)
+            if lock is None:
+                lock = self._archive_locks[path] = threading.Lock()
+            return lock
+
+    def _lookup(self, query, start, end):
+        lock = self._archive_lock(query)
+        with lock:
+            archive = self._load(query)
+        covered, latest = archive["covered_from"], archive["latest"]
+        if covered is None:
+            since, to = start, end
+        elif covered > start:
+            # Download up to the covered range, so no days are left between the two
+            since, to = start, max(end, covered[:10])
+        elif latest is not None and latest[:10] > end:
+            # The whole range is older than the newest archived article
+            since = None
+        else:
+            # Only what was published since the newest archived article
+            since, to = latest or start, end
+        new = []
+        if since is not None:
+            new, complete = self._download(query, since, to)
+        with lock:
+            archive = self._load(query)
+            if since is not None:
+                _extend_coverage(archive, since, to, new, complete)
+            for article in new:
+                archive["articles"][article["url"]] = article
+            if archive["articles"]:
+                archive["latest"] = max(article["publishedAt"] for article in archive["articles"].values())
+            self._save(query, archive)
+        articles = sorted(
+            (article for article in archive["articles"].values() if start <= article["publishedAt"][:10] <= end),
+            key=lambda article: article["publishedAt"],
+            reverse=True,
+        )
+        new_urls = {article["url"] for article in new}
+        with self._lock:
+            self.archived_articles += sum(article["url"] not in new_urls for article in articles)
+        return {"status": "ok", "totalResults": len(articles), "articles": articles}
+
+    def _download(self, query, since, end):
+        """(articles newest first, whether they are all the results between `since` and `end`)."""
+        params = {
+            "q": query,
+            "from": since,
+            "to": end,
+            "sortBy": "publishedAt",
+            "language": self.language,
+            "pageSize": self.page_size,
+            "apiKey": self.api_key,
+        }
+        articles, received, complete = [], 0, False
+        with span("newsapi.get", query=query, since=since) as stage:
+            for page in range(1, self.max_pages + 1):
+                response = self.session.get(self.url, params={**params, "page": page}, timeout=30)
+                stage.set(status=response.status_code, pages=page)
+                if response.status_code == 426 and page > 1:
+                    # The plan's result limit was reached (maximumResultsReached)
+                    break
+                if response.status_code != 200:
+                    raise NewsAPIError(response.status_code, response.text)
+                body = response.json()
+                batch = body.get("articles", [])
+                received += len(batch)
+                articles.extend(article for article in batch if article.get("url"))
+                if len(batch) < self.page_size or received >= body.get("totalResults", received):
+                    complete = True
+                    break
+            stage.set(articles=len(articles), complete=complete)
+        with self._lock:
+            self.downloads += 1
+            self.downloaded_articles += len(articles)
+        return articles, complete
+
+    def archive_path(self, query):
+        return os.path.join(self.archive_dir, self.language, quote(query.lower(), safe="") + ".json")
+
+    def _load(self, query):
+        path = self.archive_path(query)
+        if not os.path.exists(path):
+            return {"covered_from": None, "latest": None, "articles": {}}
+        with open(path) as f:
+            return json.load(f)
+
+    def _save(self, query, archive):
+        path = self.archive_path(query)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(archive, f)
+        os.replace(tmp_path, path)
+
+    def invalidate(self, query=None):
+        self._cache.invalidate(lambda key: query in (None, key[0]))
+
+    def stats(self):
+        stats = self._cache.stats()
+        with self._lock:
+            served = self.archived_articles + self.downloaded_articles
+            stats["downloads"] = self.downloads
+            # Share of the articles behind cache misses that came from the archive
+            stats["archive_hit_rate"] = self.archived_articles / served if served else 0.0
+        return stats
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_news_client(api_key):
+    """The process-wide client for this API key, shared by every page and session."""
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            client = _clients[api_key] = NewsClient(api_key)
+        return client
@@ -1,9 +1,15 @@
 import streamlit as st
-import yfinance as yf
-from langchain_groq import ChatGroq
-from langchain_experimental.agents import create_pandas_dataframe_agent
-from langchain_core.messages import HumanMessage, AIMessage
+from market_data import get_bars
+from ticker_index import ticker_input
+from backends import load
+from indicators import compute_indicators
 import pandas as pd
+import tracing
+from tracing import span
+from llm_cache import chat_model, get_agent_cache, get_answer_cache
+from analytics import context, summarize
+
+MODEL_NAME = "llama3-70b-8192"
 
 def ollama():
 
@@ -11,7 +17,7 @@ def ollama():
     st.sidebar.header("Configuration")
 
     # User input for ticker and interval
-    ticker = st.sidebar.text_input("Enter Stock Ticker", value="^NSEI")
+    ticker = ticker_input("Enter Stock Ticker", value="^NSEI")
     interval = st.sidebar.selectbox(
         "Select Interval",
         options=["1m", "5m", "30m", "60m", "1d", "5d", "1wk", "1mo", "3mo"],
@@ -21,15 +27,16 @@ def ollama():
     selected_column = st.sidebar.selectbox("Select Column to Forecast", options=columns, index=3,)  # Default: "Close"
     period = st.sidebar.slider("Select Number of Days", min_value=1, max_value=300, value=7)
     # Download stock data
-    data = yf.download(ticker, interval=interval)
+    data = get_bars(ticker, interval)
     if data.empty:
         st.error("No data found. Please check the ticker or interval.")
         return
-    data.reset_index(inplace=True)
-    data.rename(columns={"Date": "Datetime"}, inplace=True)
+    data = data.reset_index().rename(columns={"Date": "Datetime"})
+    history = data
     # Filter selected column or display all columns for the last 30 days
     if selected_column == "All":
-        data = data.tail(period)
+        # Indicators are computed over the full history, not just the rows the agent sees
+        data = pd.concat([data, compute_indicators(data)], axis=1).tail(period)
     else:
         data = data[["Datetime", selected_column]].tail(period)
 
@@ -39,17 +46,16 @@ def ollama():
         st.error("API key not found. Please set it in your secrets.")
         return
 
-    # Initialize ChatGroq LLM
-    llm = ChatGroq(groq_api_key=groq_api_key, model_name="llama3-70b-8192")
-
-    # Create a pandas dataframe agent
-    pandas_df_agent = create_pandas_dataframe_agent(
-        llm,
-        data,
-        verbose=True,
-        handle_parsing_errors="Check your output and make sure it conforms!",
-                        allow_dangerous_code=True,  agent_executor_kwargs={"handle_parsing_errors": True}
-    )
+    # LangChain is only imported once we actually need an agent
+    def build_agent():
+        create_pandas_dataframe_agent = load("langchain_agents").create_pandas_dataframe_agent
+        return create_pandas_dataframe_agent(
+            chat_model(groq_api_key, MODEL_NAME),
+            data,
+            verbose=True,
+            handle_parsing_errors="Check your output and make sure it conforms!",
+            allow_dangerous_code=True, agent_executor_kwargs={"handle_parsing_errors": True},
+        )
 
     # Define a simpler prompt to instruct the LLM as a stock analyst
     stock_analysis_prompt = """
@@ -76,17 +82,35 @@ def ollama():
         with st.chat_message("user"):
             st.write(query)
 
-        # Simplified query and agent interaction
-        full_query = f"{stock_analysis_prompt} Respond to the following query based on the data: {query}"
+        # Trend, returns, volatility, momentum, levels and drawdowns are
+        # precomputed, so most questions need no pandas round trips; without
+        # enough bars for them the agent works from the data alone
+        try:
+            analytics = context(summarize(history, interval))
+        except ValueError:
+            analytics = ""
+        instructions = f"{stock_analysis_prompt}\n{analytics}\n"
+        full_query = f"{instructions} Respond to the following query based on the data: {query}"
 
         try:
-            # Generate response using the pandas_df_agent
-            response = pandas_df_agent.run(full_query)
+            # The agent is reused while the data is unchanged, and identical
+            # questions about the same data are answered from the cache
+            pandas_df_agent, data_hash = get_agent_cache().get(MODEL_NAME, data, build_agent)
+            answers = get_answer_cache()
+            response = answers.get(MODEL_NAME, data_hash, query, context=instructions)
+            if response is None:
+                # Generate response using the pandas_df_agent
+                with span("llm.agent", ticker=ticker, interval=interval, rows=len(data)):
+                    response = pandas_df_agent.run(full_query)
+                answers.put(MODEL_NAME, data_hash, query, response, context=instructions)
+            else:
+                st.caption("Answered from the cache for this data.")
+            messages = load("langchain_messages")
 
             # Add assistant response to session state and display it
             st.session_state.messages.append({"role": "assistant", "content": response})
             st.session_state.chat_history.extend(
-                [HumanMessage(query.strip()), AIMessage(content=response)]
+                [messages.HumanMessage(query.strip()), messages.AIMessage(content=response)]
             )
 
             # Display assistant response
@@ -100,4 +124,5 @@ def ollama():
             st.write(f"Data snapshot: {data.tail()}")
 
 if __name__ == "__main__":
-    ollama()
+    with tracing.request("Ollama"):
+        ollama()
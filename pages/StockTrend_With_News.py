@@ -1,9 +1,14 @@
 import streamlit as st
-import requests
 import datetime
-import yfinance as yf
-from langchain_groq import ChatGroq
-from langchain_experimental.agents import create_pandas_dataframe_agent
+import time
+from concurrent.futures import as_completed
+from ticker_index import ticker_input
+from backends import load
+import news_analysis
+from analytics import context
+import tracing
+from tracing import span
+from news_client import NewsAPIError
 
 # Streamlit app
 def main():
@@ -14,7 +19,7 @@ def main():
 
     # Input for company name and stock ticker
     company_name = st.sidebar.text_input("Enter the company name:", value="Tata Consultancy Services")
-    ticker = st.sidebar.text_input("Enter Stock Ticker", value="TCS.NS")
+    ticker = ticker_input("Enter Stock Ticker", value="TCS.NS")
 
     # Stock data interval
     interval = "1d"
@@ -25,25 +30,6 @@ def main():
         st.error("News API key not found. Please set it in your secrets.")
         return
 
-    NEWS_API_URL = "https://newsapi.org/v2/everything"
-
-    # Fetch latest news
-    def fetch_news(company, from_date, to_date):
-        params = {
-            "q": company,
-            "from": from_date,
-            "to": to_date,
-            "sortBy": "publishedAt",
-            "language": "en",
-            "apiKey": NEWS_API_KEY,
-        }
-        response = requests.get(NEWS_API_URL, params=params)
-        if response.status_code == 200:
-            return response.json()
-        else:
-            st.error(f"Failed to fetch news: {response.status_code} - {response.text}")
-            return None
-
     # Calculate dates for the last week
     end_date = datetime.date.today()
     start_date = end_date - datetime.timedelta(days=7)
@@ -62,12 +48,43 @@ def main():
     # Fetch news and stock data when button is clicked
     if st.button("Fetch Latest News and Analyze"):
         if company_name:
-            st.write(f"Fetching news for: {company_name}")
-            news_data = fetch_news(company_name, start_date, end_date)
+            # Fetch API key for the LLM
+            groq_api_key = st.secrets.get("API_KEYS1", {}).get("GROQ_API_KEY1", "no api key found")
+            if groq_api_key == "no api key found":
+                st.error("GROQ API key not found. Please set it in your secrets.")
+                return
 
-            if news_data and "articles" in news_data:
-                articles = news_data["articles"]
-                if articles:
+            st.write(f"Fetching news for: {company_name}")
+            # News, prices and the LLM client are fetched/built at the same time;
+            # each is shown as soon as it is ready
+            started = time.perf_counter()
+            stages = news_analysis.start(company_name, ticker, interval, start_date, end_date,
+                                         NEWS_API_KEY, groq_api_key)
+            names = {future: name for name, future in stages.items()}
+            total_steps = len(stages) + 2
+            progress_bar = st.progress(0.0, text="Fetching news and prices, preparing the LLM...")
+            results = {}
+            for done, future in enumerate(as_completed(names), 1):
+                name = names[future]
+                try:
+                    results[name] = future.result()
+                except NewsAPIError as e:
+                    st.error(f"Failed to fetch news: {e}")
+                    return
+                except ValueError as e:
+                    st.error(str(e))
+                    return
+                except Exception as e:
+                    st.error(f"{news_analysis.STAGES[name]} failed: {str(e)}")
+                    return
+                progress_bar.progress(done / total_steps, text=(
+                    f"{news_analysis.STAGES[name]} ready after {time.perf_counter() - started:.1f} s"
+                ))
+                if name == "news":
+                    articles = results["news"].get("articles")
+                    if not articles:
+                        st.warning("No articles found for the specified company.")
+                        return
                     latest_article = articles[0]  # Only the latest article
                     st.success("Latest Article Found:")
                     st.markdown(f"### [{latest_article['title']}]({latest_article['url']})")
@@ -76,72 +93,70 @@ def main():
                     st.write(f"Description: {latest_article['description']}")
                     st.write("---")
 
-                    # Download stock data
-                    data = yf.download(ticker, interval=interval)
-                    if data.empty:
-                        st.error("No stock data found. Please check the ticker or interval.")
-                        return
-                    data.reset_index(inplace=True)
-
-                    # Limit data to the last 100 rows
-                    data = data.tail(100)
-
-                    # Fetch API key for the LLM
-                    groq_api_key = st.secrets.get("API_KEYS1", {}).get("GROQ_API_KEY1", "no api key found")
-                    if groq_api_key == "no api key found":
-                        st.error("GROQ API key not found. Please set it in your secrets.")
-                        return
-
-                    # Initialize ChatGroq LLM
-                    llm = ChatGroq(groq_api_key=groq_api_key, model_name="llama3-70b-8192")
-
-                    # Create a pandas dataframe agent
-                    pandas_df_agent = create_pandas_dataframe_agent(
-                        llm,
-                        data,
-                        verbose=True,
-                        handle_parsing_errors="Check your output and make sure it conforms!",
-                        allow_dangerous_code=True,  agent_executor_kwargs={"handle_parsing_errors": True}
+            data, summary = results["prices"]
+            create_pandas_dataframe_agent = load("langchain_agents").create_pandas_dataframe_agent
+
+            # Create a pandas dataframe agent
+            pandas_df_agent = create_pandas_dataframe_agent(
+                results["llm"],
+                data,
+                verbose=True,
+                handle_parsing_errors="Check your output and make sure it conforms!",
+                allow_dangerous_code=True,  agent_executor_kwargs={"handle_parsing_errors": True}
+            )
+            progress_bar.progress((len(stages) + 1) / total_steps, text="Agent ready, analyzing...")
+
+            # Refined prompt to guide the analysis
+            stock_analysis_prompt = f"""
+            You are a stock analysis expert. Given the stock data (such as Open, High, Low, Close, Volume), perform a detailed technical analysis.
+            Analyze the trends, predict future movements, and incorporate insights from this news: {latest_article['description']}.
+            {context(summary) if summary is not None else ""}
+            Provide a structured response in the following format:
+            1. **Trend Analysis**: Describe the overall trend (e.g., upward, downward, sideways).
+
+            2. **Impact of News**: Summarize how the latest news may affect the stock.
+
+            """
+
+            st.markdown("## Stock Analysis Insights")
+            answer = st.empty()
+            # The agent's LLM calls are streamed into the answer as tokens arrive
+            tokens = []
+            llm_calls = []
+
+            def on_start():
+                llm_calls.append(time.perf_counter())
+                tokens.clear()
+                progress_bar.progress((len(stages) + 1) / total_steps,
+                                      text=f"Analyzing: LLM call {len(llm_calls)}...")
+
+            def on_token(token):
+                tokens.append(token)
+                answer.markdown("".join(tokens))
+
+            try:
+                with span("llm.agent", ticker=ticker, rows=len(data)) as stage:
+                    response = pandas_df_agent.invoke(
+                        {"input": stock_analysis_prompt},
+                        config={"callbacks": [news_analysis.token_callback(on_token, on_start)]},
+                    )["output"]
+                    stage.set(llm_calls=len(llm_calls))
+
+                # Validate and display the response
+                if response and isinstance(response, str) and len(response) > 10:
+                    parsed_response = handle_llm_response(response)
+                else:
+                    parsed_response = (
+                        "The analysis could not be completed. Please refine the data or try again."
                     )
+                answer.write(parsed_response)
+                progress_bar.progress(1.0, text=f"Done after {time.perf_counter() - started:.1f} s")
 
-                    # Refined prompt to guide the analysis
-                    stock_analysis_prompt = f"""
-                    You are a stock analysis expert. Given the stock data (such as Open, High, Low, Close, Volume), perform a detailed technical analysis. 
-                    Analyze the trends, predict future movements, and incorporate insights from this news: {latest_article['description']}. 
-                    Provide a structured response in the following format:
-                    1. **Trend Analysis**: Describe the overall trend (e.g., upward, downward, sideways).
-                    
-                    2. **Impact of News**: Summarize how the latest news may affect the stock.
-                    
-                    """
-
-                    # Add progress bar during processing
-                    with st.spinner("Generating stock analysis..."):
-                        progress_bar = st.progress(0)
-                        try:
-                            response = pandas_df_agent.run(stock_analysis_prompt)
-                            for i in range(100):
-                                progress_bar.progress(i + 1)
-
-                            # Validate and display the response
-                            if response and isinstance(response, str) and len(response) > 10:
-                                parsed_response = handle_llm_response(response)
-                            else:
-                                parsed_response = (
-                                    "The analysis could not be completed. Please refine the data or try again."
-                                )
-
-                            st.markdown("## Stock Analysis Insights")
-                            st.write(parsed_response)
-
-                        except Exception as e:
-                            st.error(f"Error generating response: {str(e)}")
-                else:
-                    st.warning("No articles found for the specified company.")
-            else:
-                st.error("No data received from the News API.")
+            except Exception as e:
+                st.error(f"Error generating response: {str(e)}")
         else:
             st.warning("Please enter a company name to search for news.")
 
 if __name__ == "__main__":
-    main()
+    with tracing.request("StockTrend_With_News"):
+        main()
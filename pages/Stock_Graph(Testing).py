@@ -1,26 +1,30 @@
 import streamlit as st
-import yfinance as yf
+from market_data import get_bars
+from ticker_index import get_index
+from bar_stream import get_stream
+from indicators import MACD, RSI, macd, rsi
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import time
+import copy
+import tracing
+import charts
 
 
-# Load tickers and company names from CSV
-def load_tickers_from_csv(file_path):
+# Load the ticker search index (built from tickers.csv once and cached on disk)
+def load_ticker_index():
     try:
-        df = pd.read_csv(file_path, encoding='utf-8')
-        df['Ticker'] = df['Ticker'].str.strip()
-        df['Company'] = df['Company'].str.strip()
-        return df
+        return get_index()
     except Exception as e:
         st.error(f"Error loading tickers: {e}")
-        return pd.DataFrame()
+        return None
 
 
 # Function to fetch stock data
 def fetch_stock_data(ticker, interval):
     try:
-        data = yf.download(ticker, period="5d", interval=interval)
+        data = get_bars(ticker, interval, period="5d")
         if data.empty:
             st.warning(f"No data found for {ticker} with interval {interval}.")
         return data
@@ -29,17 +33,10 @@ def fetch_stock_data(ticker, interval):
         return pd.DataFrame()
 
 
-# Function to calculate RSI
+# Function to calculate RSI (Wilder smoothing)
 def calculate_rsi(data, window=14):
     try:
-        delta = data['Close'].diff()
-        gain = delta.where(delta > 0, 0)
-        loss = -delta.where(delta < 0, 0)
-        avg_gain = gain.rolling(window=window, min_periods=1).mean()
-        avg_loss = loss.rolling(window=window, min_periods=1).mean()
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
+        return pd.Series(rsi(data['Close'].to_numpy(), window), index=data.index)
     except Exception as e:
         st.error(f"Error calculating RSI: {e}")
         return pd.Series()
@@ -48,27 +45,25 @@ def calculate_rsi(data, window=14):
 # Function to calculate MACD
 def calculate_macd(data):
     try:
-        short_window = 12
-        long_window = 26
-        signal_window = 9
-        short_ema = data['Close'].ewm(span=short_window, adjust=False).mean()
-        long_ema = data['Close'].ewm(span=long_window, adjust=False).mean()
-        macd = short_ema - long_ema
-        signal = macd.ewm(span=signal_window, adjust=False).mean()
-        return macd, signal
+        line, signal = macd(data['Close'].to_numpy(), fast=12, slow=26, signal=9)
+        return pd.Series(line, index=data.index), pd.Series(signal, index=data.index)
     except Exception as e:
         st.error(f"Error calculating MACD: {e}")
         return pd.Series(), pd.Series()
 
 
-# Plot stock data with indicators
-def plot_stock_data(data, indicator=None):
+# Plot stock data with indicators; each series is downsampled on the server to at
+# most `max_points` points of the visible `x_range`, keeping its visual shape
+def plot_stock_data(data, indicator=None, max_points=charts.MAX_POINTS, x_range=None):
+    def line(y, **kwargs):
+        x, y = charts.downsample(data.index, y, max_points, x_range=x_range)
+        return go.Scatter(x=x, y=y, mode='lines', **kwargs)
+
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=data.index, y=data['Close'], mode='lines', name='Close Price'))
+    fig.add_trace(line(data['Close'], name='Close Price'))
 
     if indicator == 'RSI':
-        data['RSI'] = calculate_rsi(data)
-        fig.add_trace(go.Scatter(x=data.index, y=data['RSI'], mode='lines', name='RSI', yaxis='y2'))
+        fig.add_trace(line(calculate_rsi(data), name='RSI', yaxis='y2'))
         fig.update_layout(
             title='Stock Price with RSI',
             xaxis_title='Time',
@@ -78,30 +73,103 @@ def plot_stock_data(data, indicator=None):
     elif indicator == 'MACD':
         macd, signal = calculate_macd(data)
         if not macd.empty and not signal.empty:
-            fig.add_trace(go.Scatter(x=data.index, y=macd, mode='lines', name='MACD'))
-            fig.add_trace(go.Scatter(x=data.index, y=signal, mode='lines', name='Signal Line'))
+            fig.add_trace(line(macd, name='MACD'))
+            fig.add_trace(line(signal, name='Signal Line'))
         fig.update_layout(title='Stock Price with MACD', xaxis_title='Time', yaxis_title='Price (USD)')
 
     return fig
 
 
+# Streaming indicator state: every new bar costs O(1)
+def new_indicator(indicator):
+    if indicator == 'RSI':
+        return RSI(14)
+    if indicator == 'MACD':
+        return MACD(12, 26, 9)
+    return None
+
+
+# The last bar is still forming: the state only advances over the bars before
+# it, and the forming bar is evaluated on a copy
+def update_indicator(state, indicator, bars):
+    values = [state.update(close) for close in bars['Close'].iloc[:-1]]
+    values.append(copy.deepcopy(state).update(bars['Close'].iloc[-1]))
+    if indicator == 'RSI':
+        return pd.DataFrame({'RSI': values}, index=bars.index)
+    return pd.DataFrame(values, index=bars.index, columns=['MACD', 'Signal Line'])
+
+
+# Streaming chart: keeps the last `capacity` bars in a shared ring buffer, fetches
+# only bars newer than the last one and pushes just those to the browser, plus
+# the last shown bar again whenever it changed while forming
+def stream_stock_chart(container, ticker, interval, indicator, refresh, capacity=2000):
+    stream = get_stream(ticker, interval, capacity)
+    stream.poll(refresh)
+    data = stream.frame()
+    if data.empty:
+        st.warning("No data found. Please check the ticker or interval.")
+        return
+
+    state = new_indicator(indicator)
+    with container.container():
+        price_chart = st.line_chart(data[['Close']])
+        indicator_chart = None
+        if state is not None:
+            indicator_chart = st.line_chart(update_indicator(state, indicator, data))
+    shown_rows = len(data)
+    last_shown, shown = data.index[-1], data.iloc[-1].to_numpy()
+
+    while st.session_state.running:
+        time.sleep(refresh)
+        stream.poll(refresh)
+        new = stream.frame(since=last_shown, inclusive=True)
+        if new.empty or new.index[0] != last_shown:
+            continue
+        changed = not np.array_equal(new.iloc[0].to_numpy(), shown, equal_nan=True)
+        if len(new) == 1 and not changed:
+            continue
+        rows = new if changed else new.iloc[1:]
+        shown_rows += len(rows)
+        if shown_rows > 2 * capacity:
+            # The browser only ever appends; redraw from the buffer so it doesn't grow forever
+            st.rerun()
+        price_chart.add_rows(rows[['Close']])
+        if indicator_chart is not None:
+            # The previously forming bar is part of `new` either way, so the state advances over it once it has closed
+            indicator_chart.add_rows(update_indicator(state, indicator, new).iloc[len(new) - len(rows):])
+        last_shown, shown = new.index[-1], new.iloc[-1].to_numpy()
+
+
+# Visible time range of the polled chart
+ZOOM = {
+    "All": None,
+    "Last day": pd.Timedelta(days=1),
+    "Last 4 hours": pd.Timedelta(hours=4),
+    "Last hour": pd.Timedelta(hours=1),
+}
+
+
 # Real-time stock graph page
-def real_time_stock_graph(tickers_df):
+def real_time_stock_graph(ticker_index):
     st.title("Real-Time Stock Price Chart")
 
     ticker_input = st.sidebar.text_input("Enter Stock Ticker or Company Name", value="AAPL")
-    query = ticker_input.lower()
-    filtered_tickers = tickers_df[tickers_df['Ticker'].str.lower().str.contains(query) |
-                                  tickers_df['Company'].str.lower().str.contains(query)]
+    matches = ticker_index.search(ticker_input, limit=50)
 
-    if not filtered_tickers.empty:
-        selected_ticker = st.sidebar.selectbox("Select Ticker", filtered_tickers['Ticker'])
+    if matches:
+        selected_ticker = st.sidebar.selectbox("Select Ticker", [ticker for ticker, _ in matches])
     else:
         st.sidebar.warning("No matching tickers found.")
         return
 
     interval = st.sidebar.selectbox("Select Interval", ["1m", "5m", "30m", "60m", "1d", "5d", "1wk", "1mo"], index=0)
     indicator = st.sidebar.selectbox("Select Indicator", ["None", "RSI", "MACD"], index=0)
+    refresh = st.sidebar.slider("Refresh every (seconds)", min_value=1, max_value=60, value=60)
+    streaming = st.sidebar.checkbox("Streaming updates", value=True)
+    # Zooming in redraws the visible range at full resolution, up to the point budget
+    zoom = st.sidebar.selectbox("Zoom", list(ZOOM), index=0, disabled=streaming)
+    max_points = st.sidebar.number_input("Max chart points", min_value=100, max_value=20000,
+                                         value=charts.MAX_POINTS, step=100, disabled=streaming)
 
     start_chart = st.sidebar.button("Start Real-Time Chart")
     stop_chart = st.sidebar.button("Stop Real-Time Chart")
@@ -117,26 +185,33 @@ def real_time_stock_graph(tickers_df):
 
     chart_placeholder = st.empty()
 
+    if streaming:
+        if st.session_state.running:
+            stream_stock_chart(chart_placeholder, selected_ticker, interval, indicator, refresh)
+        return
+
     while st.session_state.running:
         data = fetch_stock_data(selected_ticker, interval)
         if data.empty:
             st.warning("No data found. Please check the ticker or interval.")
             break
 
-        fig = plot_stock_data(data, indicator if indicator != 'None' else None)
-        chart_placeholder.plotly_chart(fig, use_container_width=True)
+        x_range = None if ZOOM[zoom] is None else (data.index[-1] - ZOOM[zoom], None)
+        fig = plot_stock_data(data, indicator if indicator != 'None' else None, max_points, x_range)
+        charts.show_plotly(fig, chart_placeholder, chart="stock-graph")
 
-        time.sleep(60)  # Update every minute
+        time.sleep(refresh)
 
 
 # App entry point
 def app():
-    tickers_df = load_tickers_from_csv('tickers.csv')  # Replace with your file path
-    if tickers_df.empty:
+    ticker_index = load_ticker_index()
+    if ticker_index is None:
         st.error("Tickers data could not be loaded. Please check the CSV file.")
         return
-    real_time_stock_graph(tickers_df)
+    real_time_stock_graph(ticker_index)
 
 
 if __name__ == "__main__":
-    app()
+    with tracing.request("Stock_Graph"):
+        app()
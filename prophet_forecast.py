@@ -0,0 +1,126 @@
+# Prophet fitting and forecasting without any Streamlit calls
+import time
+
+import pandas as pd
+
+from backends import load
+from model_registry import data_fingerprint, get_registry
+from tracing import span
+
+DEFAULT_PARAMS = {"daily_seasonality": True}
+
+# yfinance interval names to pandas frequencies
+FREQ = {"1m": "1min", "5m": "5min", "30m": "30min", "60m": "60min"}
+
+# Seconds of the last history + future predict() per series in this process, to report what future-only saves
+_full_predict_seconds = {}
+
+
+def prepare_history(data, column, max_rows=None):
+    """Prophet's ds/y frame for `column` of a bar frame with a Date/Datetime column, leaving `data` untouched.
+
+    Timestamps stay datetimes; timezone-aware ones become naive local times, as
+    Prophet requires, and y is float64. `max_rows` keeps only the most recent bars.
+    """
+    if isinstance(data.columns, pd.MultiIndex):
+        data = data.set_axis([i[0] for i in data.columns], axis=1)
+    history = data.rename(columns={"Datetime": "ds", "Date": "ds", column: "y"})[["ds", "y"]]
+    if max_rows:
+        history = history.tail(max_rows)
+    ds = pd.to_datetime(history["ds"])
+    if ds.dt.tz is not None:
+        ds = ds.dt.tz_localize(None)
+    return history.assign(ds=ds, y=history["y"].astype("float64")).reset_index(drop=True)
+
+
+def warm_start_params(registry, meta, history):
+    """Fitted parameters of the latest stored Prophet model for this series, if `history` extends its data."""
+    previous = registry.latest(meta)
+    if previous is None:
+        return None
+    previous_meta, artifacts = previous
+    # The previous fit's last bar may have been re-fetched with new values, so only the bars before it must match
+    n_old = previous_meta["n_rows"] - 1
+    if len(history) <= n_old or data_fingerprint(history.iloc[:n_old]) != previous_meta.get("prefix_hash"):
+        return None
+    fitted = artifacts["model"].params
+    # MAP fits store one sample per parameter
+    init = {name: fitted[name][0][0] for name in ["k", "m", "sigma_obs"]}
+    init.update({name: fitted[name][0] for name in ["delta", "beta"]})
+    return init
+
+
+def fit_model(history, interval, ticker=None, column=None, params=None, notify=print, cancelled=None):
+    """Fit Prophet on `history`, reusing or warm-starting from the registry when `ticker` is given.
+
+    Prophet's fit can't be interrupted; when `cancelled()` is true once it
+    returns, the model is not stored.
+    """
+    params = params or DEFAULT_PARAMS
+    Prophet = load("prophet").Prophet
+    registry = get_registry()
+    if ticker is None:
+        with span("prophet.fit", rows=len(history)):
+            return Prophet(**params).fit(history)
+    # Reuse a model fitted on exactly this data if we have one
+    key, meta = registry.key("prophet", ticker, interval, column, params, history)
+    cached = registry.get(key)
+    if cached is not None:
+        notify("Using a previously fitted model for this data.")
+        return cached["model"]
+    model = Prophet(**params)
+    # Start the optimizer from the previous fit when only new bars were appended
+    init = warm_start_params(registry, meta, history)
+    with span("prophet.fit", rows=len(history), warm_start=init is not None):
+        if init is not None:
+            notify("Warm-starting from the previous fit.")
+            model.fit(history, init=init)
+        else:
+            model.fit(history)
+    if cancelled is None or not cancelled():
+        registry.put(key, meta, {"model": model})
+    return model
+
+
+def predict(model, periods, interval="1d", future_only=False, uncertainty_samples=None):
+    """Predict `periods` bars past the model's history, preceded by the whole history unless `future_only`.
+
+    `uncertainty_samples` overrides the model's number of simulated draws for
+    yhat_lower/yhat_upper for this call; 0 leaves those columns out.
+    """
+    future = model.make_future_dataframe(periods=periods, freq=FREQ.get(interval, interval),
+                                         include_history=not future_only)
+    samples = model.uncertainty_samples
+    if uncertainty_samples is not None:
+        model.uncertainty_samples = uncertainty_samples
+    try:
+        with span("prophet.predict", rows=len(future), periods=periods,
+                  uncertainty_samples=model.uncertainty_samples):
+            return model.predict(future)
+    finally:
+        model.uncertainty_samples = samples
+
+
+def forecast(history, periods, interval="1d", ticker=None, column=None, notify=print, future_only=False,
+             uncertainty_samples=None, cancelled=None):
+    """Fit (or reuse) a model and predict `periods` future bars, plus the history unless `future_only`.
+
+    Returns None without predicting when `cancelled()` became true during the fit.
+    """
+    model = fit_model(history, interval, ticker=ticker, column=column, notify=notify, cancelled=cancelled)
+    if cancelled is not None and cancelled():
+        return None
+    started = time.perf_counter()
+    result = predict(model, periods, interval, future_only=future_only, uncertainty_samples=uncertainty_samples)
+    seconds = time.perf_counter() - started
+    series = (ticker, interval, column)
+    if not future_only:
+        _full_predict_seconds[series] = seconds
+    elif series in _full_predict_seconds:
+        full = _full_predict_seconds[series]
+        notify(f"Predicted only the {periods} future bars in {seconds:.2f} s, {full - seconds:.2f} s less than "
+               f"the last prediction of this series with its history ({full:.2f} s).")
+    else:
+        notify(f"Predicted only the {periods} future bars in {seconds:.2f} s; "
+               "python -m benchmarks.prophet_forecast measures the saving against also predicting the history.")
+    return result
@@ -1,52 +1,48 @@
 # Prophet Forecast
-import matplotlib.pyplot as plt
 import streamlit as st
-import pandas as pd
-from prophet import Prophet
+import charts
+from jobs import get_job_manager, show_job
+from prophet_forecast import prepare_history
 
-def prophet_func(data,selected_column, interval="1d", periods=10):
+def prophet_func(data,selected_column, interval="1d", periods=10, ticker=None, future_only=False,
+                 uncertainty_samples=None, max_rows=None):
+    # future_only predicts just the horizon instead of the history plus the horizon;
+    # uncertainty_samples=0 skips the interval simulation; max_rows fits on the latest bars only
     st.subheader("Prophet Forecast")
-    data.columns = [i[0] for i in data.columns]
-    data.rename(columns={"Datetime": "ds", "Date": "ds", selected_column: "y"}, inplace=True)
-    data['ds'] = pd.to_datetime(data['ds']).dt.strftime('%Y-%m-%d %H:%M:%S')
-    model = Prophet(daily_seasonality=True)
-    model.fit(data[['ds', 'y']])
-    if interval == "1m":
-        interval = "1min"
-    elif interval == "5m":
-        interval = "5min"
-    elif interval == "30m":
-        interval = "30min"
-    elif interval == "60m":
-        interval = "60min"   
+    history = prepare_history(data, selected_column, max_rows=max_rows)
+    # Fitting runs in a worker process; this page only polls its progress
+    job_id = get_job_manager().submit("prophet", history, periods=periods, interval=interval, ticker=ticker,
+                                      column=selected_column, future_only=future_only,
+                                      uncertainty_samples=uncertainty_samples)
+    show_job(job_id, lambda forecast: show_prophet_forecast(forecast, history, selected_column))
 
-
-    future = model.make_future_dataframe(periods=periods, freq=interval)
-    forecast = model.predict(future)
+def show_prophet_forecast(forecast, history, selected_column):
     st.write("Forecast Data")
     st.dataframe(forecast.tail())
-    # Plotting
-    plt.figure(figsize=(10, 6))
-    plt.plot(forecast['ds'], forecast['yhat'], label='Forecast')
-    plt.fill_between(forecast['ds'], forecast['yhat_lower'], forecast['yhat_upper'], color='blue', alpha=0.2)
-    plt.xlabel('Date')
-    plt.ylabel(f'Predicted {selected_column} Price')
-    plt.title(f'Prophet Future Predictions for {selected_column}')
-    plt.legend()
-    plt.grid(True)
-    st.pyplot(plt)
+    # Plotting; the history part can be years of bars, so it is downsampled to its visual shape
+    fig, ax = charts.figure("prophet-forecast")
+    ax.plot(*charts.downsample(forecast['ds'], forecast['yhat']), label='Forecast')
+    if 'yhat_lower' in forecast:
+        ax.fill_between(*charts.envelope(forecast['ds'], forecast['yhat_lower'], forecast['yhat_upper']),
+                        color='blue', alpha=0.2)
+    ax.set_xlabel('Date')
+    ax.set_ylabel(f'Predicted {selected_column} Price')
+    ax.set_title(f'Prophet Future Predictions for {selected_column}')
+    ax.legend()
+    ax.grid(True)
+    charts.show(fig, chart="prophet-forecast")
     # Filter to only future dates
-    future_dates = future[future['ds'] > data['ds'].max()]
-    forecast_only_future = forecast[forecast['ds'].isin(future_dates['ds'])]
+    forecast_only_future = forecast[forecast['ds'] > history['ds'].max()]
 
     # Custom plot for future predictions only
-    plt.figure(figsize=(10, 6))
-    plt.plot(forecast_only_future['ds'], forecast_only_future['yhat'], label='Predicted')
-    plt.fill_between(forecast_only_future['ds'], forecast_only_future['yhat_lower'], forecast_only_future['yhat_upper'], color='blue', alpha=0.2)
-    plt.xlabel('Date')
-    plt.xticks(rotation=45)
-    plt.ylabel(f'Predicted {selected_column} Price')
-    plt.title(f'Future Predictions for {selected_column}')
-    plt.legend()
-    plt.grid(True)
-    st.pyplot(plt)
\ No newline at end of file
+    fig, ax = charts.figure("prophet-future")
+    ax.plot(forecast_only_future['ds'], forecast_only_future['yhat'], label='Predicted')
+    if 'yhat_lower' in forecast_only_future:
+        ax.fill_between(forecast_only_future['ds'], forecast_only_future['yhat_lower'], forecast_only_future['yhat_upper'], color='blue', alpha=0.2)
+    ax.set_xlabel('Date')
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.set_ylabel(f'Predicted {selected_column} Price')
+    ax.set_title(f'Future Predictions for {selected_column}')
+    ax.legend()
+    ax.grid(True)
+    charts.show(fig, chart="prophet-future")
\ No newline at end of file
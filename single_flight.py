@@ -0,0 +1,94 @@
+# TTL + LRU cache with single-flight loading
+#
+# Shared by the market data service and the news client: concurrent misses for
+# the same key wait for one load instead of each going to the network.
+import threading
+import time
+from collections import OrderedDict
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlightCache:
+    """Values by key that expire after a per-entry TTL; least recently used dropped beyond `max_entries`."""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get(self, key, load, ttl):
+        """The cached value for `key`, or `load()`'s result kept for `ttl` seconds.
+
+        Callers arriving while another one loads the key wait for its result, or its exception.
+        """
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            flight = self._inflight.get(key)
+            if flight is None:
+                flight = self._inflight[key] = _Flight()
+                leader = True
+                self.misses += 1
+            else:
+                leader = False
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = load()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if flight.error is None:
+                    self._cache[key] = (time.monotonic() + ttl, flight.result)
+                    self._cache.move_to_end(key)
+                    while len(self._cache) > self.max_entries:
+                        self._cache.popitem(last=False)
+                        self.evictions += 1
+            flight.done.set()
+        return flight.result
+
+    def invalidate(self, match=None):
+        """Drop the entries whose key satisfies `match(key)`, or all of them."""
+        with self._lock:
+            for key in list(self._cache):
+                if match is None or match(key):
+                    del self._cache[key]
+
+    def values(self):
+        with self._lock:
+            return [entry[1] for entry in self._cache.values()]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "entries": len(self._cache),
+                "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+from bar_store import BarStore
+
+
+def _bars(times, close):
+    return pd.DataFrame({"Close": close, "Volume": [100.0] * len(close)}, index=pd.DatetimeIndex(times, name="Date"))
+
+
+class FakeFetcher:
+    """Serves `bars` from `start` onwards and records the starts it was asked for."""
+
+    def __init__(self, bars, full_only=False):
+        self.bars = bars
+        self.full_only = full_only
+        self.starts = []
+
+    def __call__(self, ticker, interval, start=None):
+        self.starts.append(start)
+        if start is None:
+            return self.bars
+        # A provider that rejects the range returns nothing
+        return self.bars.iloc[:0] if self.full_only else self.bars[self.bars.index >= start]
+
+
+@pytest.fixture
+def days():
+    return pd.date_range(pd.Timestamp.now().normalize() - pd.Timedelta(days=4), periods=5, freq="D")
+
+
+def test_update_appends_only_new_bars_and_refreshes_the_last_one(tmp_path, days):
+    fetcher = FakeFetcher(_bars(days[:3], [1.0, 2.0, 3.0]))
+    store = BarStore(root=str(tmp_path), fetcher=fetcher)
+    assert store.update("AAPL", "1d")["Close"].tolist() == [1.0, 2.0, 3.0]
+
+    # The last stored bar was still forming and has changed since; two more have arrived
+    fetcher.bars = _bars(days, [1.0, 2.0, 3.5, 4.0, 5.0])
+    updated = store.update("AAPL", "1d")
+    assert fetcher.starts == [None, days[2]]
+    assert updated["Close"].tolist() == [1.0, 2.0, 3.5, 4.0, 5.0]
+    assert store.load("AAPL", "1d")["Close"].tolist() == [1.0, 2.0, 3.5, 4.0, 5.0]
+
+
+def test_update_falls_back_to_a_full_fetch_past_the_lookback(tmp_path):
+    now = pd.Timestamp.now().floor("min")
+    old = _bars([now - pd.Timedelta(days=40)], [1.0])
+    recent = _bars(pd.date_range(end=now, periods=3, freq="min"), [2.0, 3.0, 4.0])
+    fetcher = FakeFetcher(recent)
+    store = BarStore(root=str(tmp_path), fetcher=fetcher)
+    store.save("AAPL", "1m", old)
+    assert store.update("AAPL", "1m")["Close"].tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert fetcher.starts == [None]
+
+
+def test_empty_incremental_fetch_retries_in_full(tmp_path, days):
+    store = BarStore(root=str(tmp_path), fetcher=FakeFetcher(_bars(days[:2], [1.0, 2.0])))
+    store.update("AAPL", "1d")
+    fetcher = store.fetcher = FakeFetcher(_bars(days[2:], [3.0, 4.0, 5.0]), full_only=True)
+    assert store.update("AAPL", "1d")["Close"].tolist() == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert fetcher.starts == [days[1], None]
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from indicators import ATR, EMA, MACD, RSI, SMA, Bollinger, atr, bollinger, ema, macd, rsi, sma
+
+
+@pytest.fixture
+def bars():
+    rng = np.random.default_rng(0)
+    close = 100 + rng.standard_normal(300).cumsum()
+    high = close + rng.random(300)
+    low = close - rng.random(300)
+    return high, low, close
+
+
+def _streamed(state, values):
+    return np.array([state.update(value) for value in values])
+
+
+def _resumed(state, values, split=120):
+    # A state brought up to `split` with extend(), then streamed bar by bar
+    head = state.extend(values[:split])
+    return np.concatenate([np.asarray(head).T, _streamed(state, values[split:])])
+
+
+@pytest.mark.parametrize("make, batch", [
+    (lambda: SMA(20), lambda close: sma(close, 20)),
+    (lambda: EMA(span=12), lambda close: ema(close, span=12)),
+    (lambda: RSI(14), lambda close: rsi(close, 14)),
+])
+def test_single_output_streaming_matches_batch(bars, make, batch):
+    close = bars[2]
+    expected = batch(close)
+    assert np.array_equal(_streamed(make(), close), expected, equal_nan=True)
+    assert np.array_equal(_resumed(make(), close), expected, equal_nan=True)
+    assert np.array_equal(make().extend(close), expected, equal_nan=True)
+
+
+def test_macd_streaming_matches_batch(bars):
+    close = bars[2]
+    expected = np.column_stack(macd(close, 12, 26, 9))
+    assert np.array_equal(_streamed(MACD(12, 26, 9), close), expected, equal_nan=True)
+    assert np.array_equal(_resumed(MACD(12, 26, 9), close), expected, equal_nan=True)
+
+
+def test_bollinger_streaming_matches_batch(bars):
+    close = bars[2]
+    expected = np.column_stack(bollinger(close, 20, 2.0))
+    assert np.array_equal(_streamed(Bollinger(20, 2.0), close), expected, equal_nan=True)
+    assert np.array_equal(_resumed(Bollinger(20, 2.0), close), expected, equal_nan=True)
+
+
+def test_atr_streaming_matches_batch(bars):
+    high, low, close = bars
+    expected = atr(high, low, close, 14)
+    streamed = ATR(14)
+    assert np.array_equal([streamed.update(*bar) for bar in zip(high, low, close)], expected, equal_nan=True)
+    resumed = ATR(14)
+    head = resumed.extend(high[:120], low[:120], close[:120])
+    tail = [resumed.update(*bar) for bar in zip(high[120:], low[120:], close[120:])]
+    assert np.array_equal(np.concatenate([head, tail]), expected, equal_nan=True)
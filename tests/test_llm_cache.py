@@ -0,0 +1,65 @@
+import glob
+import os
+
+import pytest
+
+from llm_cache import AnswerCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return AnswerCache(root=str(tmp_path), max_entries=3, min_similarity=0.8)
+
+
+def _files(cache):
+    return glob.glob(os.path.join(cache.root, "*", "*.json"))
+
+
+def _age(cache, seconds):
+    # Make every stored answer look `seconds` older, so recency differences are unambiguous
+    for path in _files(cache):
+        mtime = os.path.getmtime(path) - seconds
+        os.utime(path, (mtime, mtime))
+
+
+def test_miss_then_memory_and_disk_hits(cache):
+    assert cache.get("model", "data", "What is the trend?") is None
+    cache.put("model", "data", "What is the trend?", "Upward")
+    assert cache.get("model", "data", "what is the   trend") == "Upward"
+    cache._memory.clear()
+    assert cache.get("model", "data", "What is the trend?") == "Upward"
+    assert cache.get("model", "other data", "What is the trend?") is None
+    assert cache.get("model", "data", "What is the trend?", context="other instructions") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 3)
+
+
+def test_near_duplicate_hit_never_matches_other_numbers(cache):
+    cache.put("model", "data", "What is the trend of the close over the last 5 days?", "Up")
+    assert cache.get("model", "data", "What is the trend of the close price over the last 5 days?") == "Up"
+    assert cache.get("model", "data", "What is the trend of the close over the last 6 days?") is None
+    assert cache.stats()["near_hits"] == 1
+
+
+def test_least_recently_used_answers_are_evicted(cache):
+    for n in range(3):
+        cache.put("model", "data", f"question {n}", f"answer {n}")
+        _age(cache, 10)
+    # Reading question 0 makes question 1 the least recently used
+    cache._memory.clear()
+    assert cache.get("model", "data", "question 0") == "answer 0"
+    cache.put("model", "data", "question 3", "answer 3")
+    assert len(_files(cache)) == 3
+    cache._memory.clear()
+    assert cache.get("model", "data", "question 1") is None
+    assert cache.get("model", "data", "question 0") == "answer 0"
+
+
+def test_near_duplicate_scan_only_refreshes_the_served_answer(cache):
+    cache.put("model", "data", "trend of the close over 5 days", "served")
+    cache.put("model", "data", "unrelated question about volume", "scanned")
+    _age(cache, 100)
+    before = {path: os.path.getmtime(path) for path in _files(cache)}
+    assert cache.get("model", "data", "trend of the close price over 5 days") == "served"
+    refreshed = [path for path in _files(cache) if os.path.getmtime(path) != before[path]]
+    assert len(refreshed) == 1
@@ -0,0 +1,99 @@
+import datetime
+
+import pytest
+
+from news_client import NewsClient
+
+NOW = datetime.datetime(2026, 10, 18, 12)
+
+
+class Response:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+        self.text = str(body)
+
+    def json(self):
+        return self.body
+
+
+class StubNewsAPI:
+    """A session answering /everything from a fixed list of articles, one per hour, newest first.
+
+    Beyond `max_results` it answers like NewsAPI's free plan: 426 maximumResultsReached.
+    """
+
+    def __init__(self, hours=300, max_results=None):
+        self.articles = [
+            {"url": f"https://news.example/{i}",
+             "publishedAt": (NOW - datetime.timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M:%SZ")}
+            for i in range(hours)
+        ]
+        self.max_results = max_results
+        self.requests = []
+
+    def get(self, url, params, timeout):
+        self.requests.append((params["from"], params["to"], params["page"]))
+        first = (params["page"] - 1) * params["pageSize"]
+        if self.max_results is not None and first >= self.max_results:
+            return Response(426, {"status": "error", "code": "maximumResultsReached"})
+        matching = [
+            article for article in self.articles
+            if article["publishedAt"][:len(params["from"])] >= params["from"]
+            and article["publishedAt"][:10] <= params["to"]
+        ]
+        return Response(200, {"status": "ok", "totalResults": len(matching),
+                               "articles": matching[first:first + params["pageSize"]]})
+
+
+@pytest.fixture
+def make_client(tmp_path):
+    def make(session, **kwargs):
+        return NewsClient("key", archive_dir=str(tmp_path), session=session, **kwargs)
+    return make
+
+
+def test_pages_until_all_results_are_received(make_client):
+    stub = StubNewsAPI()
+    result = make_client(stub).everything("acme", "2026-10-10", "2026-10-18")
+    assert [page for _, _, page in stub.requests] == [1, 2, 3]
+    assert len(result["articles"]) == len({article["url"] for article in result["articles"]}) == 205
+    assert result["articles"][0]["publishedAt"] > result["articles"][-1]["publishedAt"]
+
+
+def test_truncated_download_only_covers_back_to_the_oldest_article(make_client):
+    stub = StubNewsAPI(max_results=100)
+    client = make_client(stub)
+    client.everything("acme", "2026-10-10", "2026-10-18")
+    oldest = min(article["publishedAt"] for article in client._load("acme")["articles"].values())
+    assert client._load("acme")["covered_from"] == oldest
+
+    # The uncovered days are downloaded again instead of being served as complete
+    stub.requests.clear()
+    client.invalidate()
+    client.everything("acme", "2026-10-10", "2026-10-18")
+    assert stub.requests and stub.requests[0][:2] == ("2026-10-10", "2026-10-18")
+
+
+def test_older_range_is_downloaded_up_to_the_covered_one(make_client):
+    stub = StubNewsAPI(hours=500)
+    client = make_client(stub)
+    client.everything("acme", "2026-10-10", "2026-10-18")
+    stub.requests.clear()
+    client.everything("acme", "2026-10-01", "2026-10-03")
+    assert {request[:2] for request in stub.requests} == {("2026-10-01", "2026-10-10")}
+    assert client._load("acme")["covered_from"] == "2026-10-01"
+
+    # Days between the two ranges are now archived, with no further download
+    stub.requests.clear()
+    result = client.everything("acme", "2026-10-05", "2026-10-07")
+    assert stub.requests == []
+    assert len(result["articles"]) == 72
+
+
+def test_repeated_lookup_is_served_from_the_cache(make_client):
+    stub = StubNewsAPI()
+    client = make_client(stub)
+    first = client.everything("acme", "2026-10-15", "2026-10-18")
+    assert client.everything("acme", "2026-10-15", "2026-10-18") is first
+    assert client.stats()["hits"] == 1 and client.stats()["downloads"] == 1
@@ -0,0 +1,177 @@
+# Prebuilt search index over tickers.csv for ticker/company autocomplete
+import bisect
+import csv
+import os
+import pickle
+import re
+import tempfile
+import threading
+
+import numpy as np
+import streamlit as st
+
+TICKERS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tickers.csv")
+INDEX_PATH = os.environ.get("TICKER_INDEX_PATH", os.path.join("data", "ticker_index.pkl"))
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class TickerIndex:
+    """Ranked ticker/company lookups without scanning the whole table.
+
+    Tickers and company words are kept as sorted key arrays for prefix search,
+    and an inverted index of character trigrams narrows substring matches down
+    to a few candidate rows. Ranking: exact ticker, ticker prefix, company word
+    prefix, ticker substring, company substring; ties keep the CSV order.
+    """
+
+    def __init__(self, tickers, companies, source=None):
+        self.tickers = tickers
+        self.companies = companies
+        self.source = source
+        self._lower_tickers = [ticker.lower() for ticker in tickers]
+        self._lower_companies = [company.lower() for company in companies]
+        self._exact = {}
+        for row, ticker in enumerate(self._lower_tickers):
+            self._exact.setdefault(ticker, row)
+
+        order = sorted(range(len(tickers)), key=self._lower_tickers.__getitem__)
+        self._ticker_keys = [self._lower_tickers[row] for row in order]
+        self._ticker_rows = np.array(order, dtype=np.int32)
+
+        words = sorted(
+            (word, row)
+            for row, company in enumerate(self._lower_companies)
+            for word in set(_WORD.findall(company))
+        )
+        self._word_keys = [word for word, _ in words]
+        self._word_rows = np.array([row for _, row in words], dtype=np.int32)
+
+        postings = {}
+        for row, (ticker, company) in enumerate(zip(self._lower_tickers, self._lower_companies)):
+            for gram in _trigrams(ticker) | _trigrams(company):
+                postings.setdefault(gram, []).append(row)
+        self._postings = {gram: np.array(rows, dtype=np.int32) for gram, rows in postings.items()}
+
+    @classmethod
+    def from_csv(cls, path=TICKERS_CSV):
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            rows = [(row["Ticker"].strip(), row["Company"].strip()) for row in csv.DictReader(f)]
+        return cls([ticker for ticker, _ in rows], [company for _, company in rows], source=_signature(path))
+
+    def lookup(self, ticker):
+        """Company name for an exact ticker, or None."""
+        row = self._exact.get(ticker.strip().lower())
+        return None if row is None else self.companies[row]
+
+    def _prefix_rows(self, keys, rows, query, limit):
+        lo = bisect.bisect_left(keys, query)
+        hi = bisect.bisect_left(keys, query + "\uffff")
+        matches = rows[lo:hi]
+        if len(matches) > limit:
+            matches = np.partition(matches, limit - 1)[:limit]
+        return np.sort(matches)
+
+    def _substring_rows(self, query, limit):
+        grams = sorted(_trigrams(query), key=lambda gram: len(self._postings.get(gram, ())))
+        if not grams or grams[0] not in self._postings:
+            return [], []
+        candidates = self._postings[grams[0]]
+        for gram in grams[1:]:
+            candidates = np.intersect1d(candidates, self._postings[gram], assume_unique=True)
+            if not len(candidates):
+                break
+        in_ticker, in_company = [], []
+        for row in candidates.tolist():
+            if len(in_ticker) >= limit and len(in_company) >= limit:
+                break
+            if query in self._lower_tickers[row]:
+                in_ticker.append(row)
+            elif query in self._lower_companies[row]:
+                in_company.append(row)
+        return in_ticker[:limit], in_company[:limit]
+
+    def search(self, query, limit=20):
+        """Up to `limit` (ticker, company) pairs matching `query`, best first."""
+        query = query.strip().lower()
+        if not query:
+            rows = range(min(limit, len(self.tickers)))
+        else:
+            tiers = []
+            exact = self._exact.get(query)
+            if exact is not None:
+                tiers.append([exact])
+            tiers.append(self._prefix_rows(self._ticker_keys, self._ticker_rows, query, limit).tolist())
+            tiers.append(self._prefix_rows(self._word_keys, self._word_rows, query, limit).tolist())
+            tiers.extend(self._substring_rows(query, limit))
+            rows, seen = [], set()
+            for tier in tiers:
+                for row in tier:
+                    if row not in seen:
+                        seen.add(row)
+                        rows.append(row)
+            rows = rows[:limit]
+        return [(self.tickers[row], self.companies[row]) for row in rows]
+
+
+def _signature(path):
+    stat = os.stat(path)
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def load_index(csv_path=TICKERS_CSV, index_path=INDEX_PATH):
+    """Load the pickled index, rebuilding it when tickers.csv has changed since it was written."""
+    source = _signature(csv_path)
+    if os.path.exists(index_path):
+        with open(index_path, "rb") as f:
+            index = pickle.load(f)
+        if index.source == source:
+            return index
+    index = TickerIndex.from_csv(csv_path)
+    os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(index_path) or ".", suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, index_path)
+    return index
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = load_index()
+        return _index
+
+
+def ticker_input(label, value="", container=st.sidebar, limit=20):
+    """Text box with ticker/company autocomplete; returns the chosen ticker.
+
+    Falls back to the typed text when nothing in tickers.csv matches it, and
+    offers it first when it isn't a listed ticker itself, so a ticker missing
+    from the file isn't silently replaced by a longer one it prefixes.
+    """
+    query = container.text_input(label, value=value)
+    index = get_index()
+    matches = index.search(query, limit=limit)
+    typed = query.strip()
+    if not matches:
+        return typed
+    companies = dict(matches)
+    options = [ticker for ticker, _ in matches]
+    if typed and index.lookup(typed) is None:
+        options.insert(0, typed)
+    return container.selectbox(
+        "Select Ticker",
+        options,
+        format_func=lambda ticker: f"{ticker} — {companies[ticker]}" if ticker in companies else f"{ticker} (as typed)",
+        key=f"{label}-matches",
+    )
@@ -0,0 +1,222 @@
+# Timing spans around the app's slow stages, with a per-request performance panel
+#
+# Tracing is off unless TRACING=1. While it is off, span() returns a shared
+# no-op object, so instrumented code pays one function call per stage.
+# Finished spans are appended to TRACE_FILE as JSON lines, and a histogram of
+# span durations is written to METRICS_FILE in the OpenMetrics text format at
+# the end of every page run.
+import contextlib
+import contextvars
+import itertools
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import deque
+
+ENABLED = os.environ.get("TRACING", "0") == "1"
+TRACE_FILE = os.environ.get("TRACE_FILE", os.path.join("data", "traces.jsonl"))
+METRICS_FILE = os.environ.get("METRICS_FILE", os.path.join("data", "metrics.prom"))
+
+# Histogram bucket bounds in seconds, from a cache hit to a full LSTM training run
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_request = contextvars.ContextVar("trace_request", default=None)
+_parent = contextvars.ContextVar("trace_parent", default=None)
+_capture = contextvars.ContextVar("trace_capture", default=None)
+_ids = itertools.count(1)
+
+
+class _NoSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NO_SPAN = _NoSpan()
+
+
+class Span:
+    """A timed stage; attributes known only inside the block can be added with set()."""
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.id = f"{os.getpid()}-{next(_ids)}"
+        self.parent = _parent.get()
+        self._token = _parent.set(self.id)
+        self.start = time.time()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._started
+        _parent.reset(self._token)
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        current = _request.get()
+        record = {
+            "name": self.name,
+            "id": self.id,
+            "parent": self.parent,
+            "request": current and current["id"],
+            "page": current and current["page"],
+            "start": self.start,
+            "duration_s": duration,
+            "attributes": self.attributes,
+        }
+        captured = _capture.get()
+        if captured is not None:
+            captured.append(record)
+        _recorder.record(record)
+        return False
+
+
+def span(name, **attributes):
+    """Context manager timing the enclosed block as `name`; a no-op while tracing is off."""
+    if not ENABLED:
+        return _NO_SPAN
+    return Span(name, attributes)
+
+
+class _Recorder:
+    """Recent spans of this process, the duration histograms and the trace file."""
+
+    def __init__(self, path=TRACE_FILE, max_spans=5000):
+        self.path = path
+        self.spans = deque(maxlen=max_spans)
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, record, write=True):
+        with self._lock:
+            self.spans.append(record)
+            counts, total = self.histograms.get(record["name"], ([0] * (len(BUCKETS) + 1), 0.0))
+            counts[_bucket(record["duration_s"])] += 1
+            self.histograms[record["name"]] = (counts, total + record["duration_s"])
+            if write and self.path:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a") as f:
+                    f.write(json.dumps(record, default=str) + "\n")
+
+    def request_spans(self, request_id):
+        with self._lock:
+            return [record for record in self.spans if record["request"] == request_id]
+
+    def openmetrics(self):
+        name = "stock_app_span_seconds"
+        lines = [f"# TYPE {name} histogram", f"# UNIT {name} seconds",
+                 f"# HELP {name} Duration of instrumented stages."]
+        with self._lock:
+            histograms = {key: (list(counts), total) for key, (counts, total) in self.histograms.items()}
+        for stage, (counts, total) in sorted(histograms.items()):
+            label = json.dumps(stage)
+            cumulative = 0
+            for bound, count in zip(BUCKETS + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{name}_bucket{{span={label},le="{le}"}} {cumulative}')
+            lines.append(f"{name}_sum{{span={label}}} {total}")
+            lines.append(f"{name}_count{{span={label}}} {cumulative}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+def _bucket(duration):
+    for i, bound in enumerate(BUCKETS):
+        if duration <= bound:
+            return i
+    return len(BUCKETS)
+
+
+_recorder = _Recorder()
+
+
+@contextlib.contextmanager
+def capture():
+    """Collect the spans finished inside the block, e.g. to send them back from a worker process."""
+    spans = []
+    token = _capture.set(spans)
+    try:
+        yield spans
+    finally:
+        _capture.reset(token)
+
+
+def adopt(spans):
+    """Attach spans recorded in another process (already in the trace file) to the current request."""
+    if not ENABLED or not spans:
+        return
+    current = _request.get()
+    for record in spans:
+        if current is not None and record["request"] is None:
+            record = dict(record, request=current["id"], page=current["page"])
+        _recorder.record(record, write=False)
+
+
+def start_request(page):
+    """Mark the start of a page run; spans until end_request() are shown in its panel."""
+    if ENABLED:
+        _request.set({"id": uuid.uuid4().hex[:12], "page": page})
+
+
+def write_metrics(path=METRICS_FILE):
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        f.write(_recorder.openmetrics())
+    os.replace(tmp_path, path)
+
+
+def end_request(container=None):
+    """Write the metrics file and offer the sidebar performance panel for this page run."""
+    current = _request.get()
+    if not ENABLED or current is None:
+        return
+    import streamlit as st
+
+    write_metrics()
+    container = container or st.sidebar
+    if not container.checkbox("Show performance", key="performance-panel"):
+        return
+    spans = _recorder.request_spans(current["id"])
+    with container.expander("Performance", expanded=True):
+        if not spans:
+            st.write("No instrumented stages ran.")
+            return
+        total = sum(record["duration_s"] for record in spans if record["parent"] is None)
+        st.write(f"{len(spans)} stages, {total * 1000:.0f} ms at the top level")
+        st.dataframe(
+            [
+                {
+                    "stage": record["name"],
+                    "ms": round(record["duration_s"] * 1000, 1),
+                    **{key: str(value) for key, value in record["attributes"].items()},
+                }
+                for record in spans
+            ],
+            hide_index=True,
+        )
+
+
+@contextlib.contextmanager
+def request(page, container=None):
+    """start_request/end_request around a block; the panel is drawn even when the block returns early."""
+    start_request(page)
+    try:
+        yield
+    finally:
+        end_request(container)
@@ -0,0 +1,60 @@
+# Sliding-window dataset helpers for the sequence models
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _as_2d(values):
+    values = np.asarray(values)
+    if values.ndim == 1:
+        values = values.reshape(-1, 1)
+    return values
+
+
+def sliding_windows(values, window_size, stride=1, target=0, horizon=1):
+    """Return (X, y) as strided views over `values` without copying.
+
+    `values` is (n,) or (n, features). X has shape (windows, window_size, features).
+    y is the `target` feature of the bar right after each window, or the next
+    `horizon` bars as a (windows, horizon) view when horizon > 1.
+    """
+    values = _as_2d(values)
+    n_windows = len(values) - window_size - horizon + 1
+    if n_windows < 1:
+        raise ValueError(f"Need at least {window_size + horizon} rows to build windows, got {len(values)}")
+    # sliding_window_view puts the window axis last; move it back in front of the features
+    X = sliding_window_view(values, window_size, axis=0).transpose(0, 2, 1)[:n_windows:stride]
+    if horizon == 1:
+        y = values[window_size:, target][::stride]
+    else:
+        y = sliding_window_view(values[window_size:, target], horizon)[::stride]
+    return X, y
+
+
+def window_dataset(values, window_size, batch_size=32, stride=1, target=0, start=0, end=None, horizon=1):
+    """Build a tf.data pipeline over windows `start`..`end` that only materializes one batch at a time.
+
+    Window indices and targets match `sliding_windows(values, window_size, horizon=horizon)`.
+    `target` may also be a list of feature indices; y is then every target of the
+    next `horizon` bars, flattened bar by bar to length horizon * len(target).
+    """
+    import tensorflow as tf
+
+    series = tf.constant(_as_2d(values), dtype=tf.float32)
+    n_windows = len(series) - window_size - horizon + 1
+    end = n_windows if end is None else min(end, n_windows)
+    targets = list(target) if isinstance(target, (list, tuple)) else None
+
+    def take(i):
+        x = series[i:i + window_size]
+        if targets is not None:
+            return x, tf.reshape(tf.gather(series[i + window_size:i + window_size + horizon], targets, axis=1), [-1])
+        y = series[i + window_size:i + window_size + horizon, target]
+        return x, (y[0] if horizon == 1 else y)
+
+    return (
+        tf.data.Dataset.range(start, end, stride)
+        .map(take, num_parallel_calls=tf.data.AUTOTUNE)
+        .batch(batch_size)
+        .prefetch(tf.data.AUTOTUNE)
+    )